@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import Irradiacion
+
+# Valor usado cuando no hay irradiación registrada para la ciudad y el mes
+IRRADIACION_POR_DEFECTO = Decimal("4.5")
+
+MAX_FALTANTES_REPORTADOS = 1000
+
+
+def normalizar_mes(mes: str) -> str:
+    """
+    Clave del mes sin mayúsculas ni espacios alrededor, como la comparación
+    `mes = ...` de MySQL con su collation por defecto ('enero' = 'Enero ')
+    """
+    return mes.strip().casefold()
+
+
+class CacheIrradiacion:
+    """
+    Copia en memoria de la tabla `irradiacion`, indexada por (id_ciudad, mes)
+    con el mes normalizado (ver normalizar_mes).
+
+    La tabla es pequeña y casi estática: se carga completa al inicio (o en el
+    primer uso) y se vuelve a cargar cuando vence el TTL o cuando se invalida
+    explícitamente. Lleva contadores de aciertos y fallos; los pares sin dato
+    quedan registrados para que el valor por defecto no pase desapercibido.
+    """
+
+    def __init__(self, ttl_segundos: float = 3600):
+        self.ttl = ttl_segundos
+        self._valores = {}
+        self._vence_en = 0.0
+        self._lock = threading.Lock()
+        self._lock_recarga = threading.Lock()
+        self._faltantes = set()
+        self.aciertos = 0
+        self.fallos = 0
+        self.recargas = 0
+
+    def cargar(self, db: Session):
+        """Lee toda la tabla y reemplaza el contenido del cache"""
+        filas = db.execute(
+            select(Irradiacion.id_ciudad, Irradiacion.mes, Irradiacion.irradiacion_kwh_m2_mes)
+            .order_by(Irradiacion.id)
+        )
+        valores = {}
+        for id_ciudad, mes, valor in filas:
+            # Igual que .first(): si hay duplicados gana la primera fila
+            valores.setdefault((id_ciudad, normalizar_mes(mes)), valor)
+
+        with self._lock:
+            self._valores = valores
+            self._vence_en = time.monotonic() + self.ttl
+            self._faltantes.clear()
+            self.recargas += 1
+
+    def invalidar(self):
+        """Fuerza la recarga en la próxima consulta"""
+        with self._lock:
+            self._vence_en = 0.0
+
+    def obtener(self, db: Session, id_ciudad: int, mes: str) -> Optional[Decimal]:
+        """Irradiación de la ciudad y mes, o None si no está registrada"""
+        if time.monotonic() >= self._vence_en:
+            with self._lock_recarga:
+                # Otro hilo pudo recargar mientras esperábamos
+                if time.monotonic() >= self._vence_en:
+                    self.cargar(db)
+
+        valor = self._valores.get((id_ciudad, normalizar_mes(mes)))
+        with self._lock:
+            if valor is None:
+                self.fallos += 1
+                nuevo = (id_ciudad, mes) not in self._faltantes
+                if nuevo and len(self._faltantes) < MAX_FALTANTES_REPORTADOS:
+                    self._faltantes.add((id_ciudad, mes))
+                    print(f"Advertencia: sin irradiación para ciudad {id_ciudad}, mes {mes}; "
+                          f"se usa {IRRADIACION_POR_DEFECTO}")
+            else:
+                self.aciertos += 1
+        return valor
+
+    def obtener_o_defecto(self, db: Session, id_ciudad: int, mes: str) -> Tuple[Decimal, bool]:
+        """
+        Irradiación de la ciudad y mes; si no existe devuelve
+        (IRRADIACION_POR_DEFECTO, True) para marcar el valor como estimado
+        """
+        valor = self.obtener(db, id_ciudad, mes)
+        if valor is None:
+            return IRRADIACION_POR_DEFECTO, True
+        return valor, False
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._valores),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else None,
+                "recargas": self.recargas,
+                "vence_en_segundos": round(max(self._vence_en - time.monotonic(), 0), 1),
+                "faltantes": [
+                    {"id_ciudad": id_ciudad, "mes": mes}
+                    for id_ciudad, mes in sorted(self._faltantes, key=str)
+                ]
+            }
+
+
+cache_irradiacion = CacheIrradiacion(
+    ttl_segundos=float(os.getenv("IRRADIACION_CACHE_TTL_SEG", "3600"))
+)
@@ -0,0 +1,193 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.models.models import Departamento, Ciudad
+from app.models.schemas import DepartamentoResponse, CiudadResponse
+
+_LISTA_DEPARTAMENTOS = TypeAdapter(List[DepartamentoResponse])
+_LISTA_CIUDADES = TypeAdapter(List[CiudadResponse])
+
+
+class EntradaJSON:
+    """Cuerpo JSON ya serializado junto con su ETag fuerte"""
+
+    __slots__ = ("cuerpo", "etag")
+
+    def __init__(self, cuerpo: bytes):
+        self.cuerpo = cuerpo
+        self.etag = '"' + hashlib.sha256(cuerpo).hexdigest()[:32] + '"'
+
+
+def _etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato == "*":
+            return True
+        # If-None-Match usa comparación débil
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
+
+
+def respuesta_json(entrada: EntradaJSON, if_none_match: Optional[str] = None) -> Response:
+    """200 con el cuerpo cacheado, o 304 sin cuerpo si el cliente ya lo tiene"""
+    cabeceras = {"ETag": entrada.etag, "Cache-Control": "no-cache"}
+    if _etag_coincide(if_none_match, entrada.etag):
+        return Response(status_code=304, headers=cabeceras)
+    return Response(content=entrada.cuerpo, media_type="application/json", headers=cabeceras)
+
+
+class CacheReferencias:
+    """
+    Departamentos y ciudades serializados a JSON una sola vez.
+
+    Se reconstruye cuando vence el TTL o cuando este proceso confirma un
+    insert, update o delete del ORM sobre Departamento o Ciudad. El TTL
+    cubre los cambios hechos por otros workers o directamente en la BD.
+
+    Los métodos `*_async` son para AsyncSession: consultan con `await` y
+    se sincronizan con un asyncio.Lock. No se debe usar la versión síncrona
+    con `run_sync`, porque retendría el threading.Lock en el hilo del event
+    loop mientras espera a la base de datos y la siguiente petición
+    bloquearía el loop entero.
+    """
+
+    def __init__(self, ttl_segundos: float = 300):
+        self.ttl = ttl_segundos
+        self._departamentos = None
+        self._ciudades = None
+        self._ciudades_por_departamento = {}
+        self._vence_en = 0.0
+        self._lock = threading.Lock()
+        self._lock_async = None
+        self._loop_async = None
+        self.reconstrucciones = 0
+
+    def _construir(self, db: Session):
+        departamentos = db.scalars(select(Departamento).order_by(Departamento.id)).all()
+        ciudades = db.scalars(select(Ciudad).order_by(Ciudad.id)).all()
+        self._publicar(departamentos, ciudades)
+
+    async def _construir_async(self, db: AsyncSession):
+        departamentos = (await db.scalars(select(Departamento).order_by(Departamento.id))).all()
+        ciudades = (await db.scalars(select(Ciudad).order_by(Ciudad.id))).all()
+        self._publicar(departamentos, ciudades)
+
+    def _publicar(self, departamentos: list, ciudades: list):
+        por_departamento: Dict[int, list] = {d.id: [] for d in departamentos}
+        for ciudad in ciudades:
+            if ciudad.id_departamento in por_departamento:
+                por_departamento[ciudad.id_departamento].append(ciudad)
+
+        self._departamentos = EntradaJSON(_LISTA_DEPARTAMENTOS.dump_json(departamentos))
+        self._ciudades = EntradaJSON(_LISTA_CIUDADES.dump_json(ciudades))
+        self._ciudades_por_departamento = {
+            id_departamento: EntradaJSON(_LISTA_CIUDADES.dump_json(lista))
+            for id_departamento, lista in por_departamento.items()
+        }
+        self._vence_en = time.monotonic() + self.ttl
+        self.reconstrucciones += 1
+
+    def _vigente(self, db: Session):
+        if time.monotonic() >= self._vence_en:
+            with self._lock:
+                # Otro hilo pudo reconstruir mientras esperábamos
+                if time.monotonic() >= self._vence_en:
+                    self._construir(db)
+
+    def _lock_del_loop(self) -> asyncio.Lock:
+        # Un asyncio.Lock queda atado al loop en que se usa; con otro loop
+        # (p. ej. un asyncio.run nuevo en pruebas) se crea uno nuevo
+        loop = asyncio.get_running_loop()
+        if self._loop_async is not loop:
+            self._loop_async, self._lock_async = loop, asyncio.Lock()
+        return self._lock_async
+
+    async def _vigente_async(self, db: AsyncSession):
+        if time.monotonic() >= self._vence_en:
+            async with self._lock_del_loop():
+                # Otra petición pudo reconstruir mientras esperábamos
+                if time.monotonic() >= self._vence_en:
+                    await self._construir_async(db)
+
+    def departamentos(self, db: Session) -> EntradaJSON:
+        self._vigente(db)
+        return self._departamentos
+
+    def ciudades(self, db: Session) -> EntradaJSON:
+        self._vigente(db)
+        return self._ciudades
+
+    def ciudades_de_departamento(self, db: Session, id_departamento: int) -> Optional[EntradaJSON]:
+        """Ciudades del departamento, o None si el departamento no existe"""
+        self._vigente(db)
+        return self._ciudades_por_departamento.get(id_departamento)
+
+    async def departamentos_async(self, db: AsyncSession) -> EntradaJSON:
+        await self._vigente_async(db)
+        return self._departamentos
+
+    async def ciudades_async(self, db: AsyncSession) -> EntradaJSON:
+        await self._vigente_async(db)
+        return self._ciudades
+
+    async def ciudades_de_departamento_async(self, db: AsyncSession,
+                                             id_departamento: int) -> Optional[EntradaJSON]:
+        await self._vigente_async(db)
+        return self._ciudades_por_departamento.get(id_departamento)
+
+    def invalidar(self):
+        """Fuerza la reconstrucción en la próxima consulta"""
+        self._vence_en = 0.0
+
+    def estadisticas(self) -> dict:
+        return {
+            "reconstrucciones": self.reconstrucciones,
+            "departamentos": len(self._ciudades_por_departamento),
+            "vence_en_segundos": round(max(self._vence_en - time.monotonic(), 0), 1),
+            "etag_departamentos": self._departamentos.etag if self._departamentos else None,
+            "etag_ciudades": self._ciudades.etag if self._ciudades else None,
+        }
+
+
+cache_referencias = CacheReferencias(
+    ttl_segundos=float(os.getenv("REFERENCIAS_CACHE_TTL_SEG", "300"))
+)
+
+
+def _marcar_cambio(mapper, connection, objeto):
+    # Se invalida al hacer commit: reconstruir antes leería datos sin confirmar
+    sesion = object_session(objeto)
+    if sesion is not None:
+        sesion.info["referencias_modificadas"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_tras_commit(sesion):
+    if sesion.info.pop("referencias_modificadas", False):
+        cache_referencias.invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios(sesion):
+    sesion.info.pop("referencias_modificadas", None)
+
+
+# Cualquier cambio hecho por el ORM en las tablas de referencia invalida el cache
+for _modelo in (Departamento, Ciudad):
+    for _evento in ("after_insert", "after_update", "after_delete"):
+        event.listen(_modelo, _evento, _marcar_cambio)
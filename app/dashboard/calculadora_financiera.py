@@ -1,5 +1,8 @@
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict
+from typing import Dict, List
+import numpy as np
+
+from app.instrumentacion.metricas import cronometrado
 
 # CONSTANTES PARA CÁLCULOS
 COSTO_KWH = Decimal("0.18")
@@ -9,6 +12,58 @@ EFICIENCIA_SISTEMA = Decimal("0.85")
 AREA_PANEL = Decimal("1.6")
 POTENCIA_PANEL = Decimal("0.5")
 
+# Factores de descuento (1 + TASA_DESCUENTO) ** año, calculados una sola vez
+FACTORES_DESCUENTO = tuple(
+    (Decimal("1") + TASA_DESCUENTO) ** año for año in range(1, VIDA_UTIL_SISTEMA + 1)
+)
+
+# Equivalentes en float para el cálculo por lotes
+FACTOR_ANUALIDAD = float(sum(1 / (1 + float(TASA_DESCUENTO)) ** año
+                             for año in range(1, VIDA_UTIL_SISTEMA + 1)))
+
+CAMPOS_MONETARIOS = (
+    "capex", "opex", "vpn", "tir", "inversion", "ahorro_anual", "periodo_retorno",
+    "potencia_instalada_kw", "area_utilizada_m2", "energia_generada"
+)
+
+
+# Tabla de factores de anualidad A(r) = sum((1 + r) ** -año) sobre una malla
+# de tasas; se usa para el punto de partida del cálculo de la TIR
+_MALLA_TASAS = np.concatenate([np.linspace(-0.95, 0.0, 96, endpoint=False),
+                               np.geomspace(1e-4, 10.0, 160)])
+_MALLA_ANUALIDAD = (
+    (1 + _MALLA_TASAS[:, None]) ** -np.arange(1, VIDA_UTIL_SISTEMA + 1)
+).sum(axis=1)
+
+
+def _redondear_centavos(valores: np.ndarray) -> np.ndarray:
+    """
+    Redondeo a 2 decimales con ROUND_HALF_UP (alejándose de cero), como
+    Decimal.quantize. El pequeño margen absorbe el error de representación
+    de los float cuando el valor exacto termina justo en medio centavo.
+    """
+    centavos = np.abs(valores) * 100
+    centavos = np.floor(centavos + 0.5 + centavos * 1e-13 + 1e-9)
+    # + 0.0 convierte -0.0 en 0.0
+    return np.copysign(centavos / 100, valores) + 0.0
+
+
+def _anualidad_y_derivada(r: np.ndarray):
+    """
+    A(r) = (1 - (1 + r) ** -N) / r y su derivada, en forma cerrada; cerca de
+    r = 0 se usa la expansión de primer orden para evitar la cancelación
+    """
+    n = VIDA_UTIL_SISTEMA
+    cerca_de_cero = np.abs(r) < 1e-7
+    r_seguro = np.where(cerca_de_cero, 1.0, r)
+    descuento_n = (1 + r_seguro) ** -n
+    anualidad = (1 - descuento_n) / r_seguro
+    derivada = (n * descuento_n / (1 + r_seguro) - anualidad) / r_seguro
+    
+    anualidad = np.where(cerca_de_cero, n - n * (n + 1) / 2 * r, anualidad)
+    derivada = np.where(cerca_de_cero, -n * (n + 1) / 2, derivada)
+    return anualidad, derivada
+
 class CalculadoraFinanciera:
     
     @staticmethod
@@ -84,10 +139,9 @@ class CalculadoraFinanciera:
     def calcular_vpn(capex: Decimal, opex: Decimal, ahorro_anual: Decimal) -> Decimal:
         """Calcula el Valor Presente Neto"""
         vpn = -capex
+        flujo_anual = ahorro_anual - opex
         
-        for año in range(1, VIDA_UTIL_SISTEMA + 1):
-            flujo_anual = ahorro_anual - opex
-            factor_descuento = (Decimal("1") + TASA_DESCUENTO) ** año
+        for factor_descuento in FACTORES_DESCUENTO:
             flujo_descontado = flujo_anual / factor_descuento
             vpn += flujo_descontado
         
@@ -95,14 +149,82 @@ class CalculadoraFinanciera:
     
     @staticmethod
     def calcular_tir(capex: Decimal, ahorro_anual: Decimal, opex: Decimal) -> Decimal:
-        """Calcula la Tasa Interna de Retorno (simplificada)"""
-        flujo_anual_neto = ahorro_anual - opex
+        """
+        Calcula la Tasa Interna de Retorno (%) del flujo: -capex en el año 0 y
+        (ahorro_anual - opex) en cada año de VIDA_UTIL_SISTEMA
+        """
+        tir = CalculadoraFinanciera.calcular_tir_lote(
+            np.array([float(capex)]), np.array([float(ahorro_anual - opex)])
+        )
+        tir = _redondear_centavos(tir)[0]
+        return Decimal(repr(float(tir))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    
+    @staticmethod
+    def calcular_tir_lote(
+        capex,
+        flujo_anual_neto,
+        tir_inicial=None,
+        tolerancia: float = 1e-10,
+        max_iteraciones: int = 60
+    ) -> np.ndarray:
+        """
+        TIR (%) de muchos proyectos a la vez.
+
+        Resuelve -capex + flujo * A(r) = 0 con pasos de Newton vectorizados,
+        acotados por un intervalo que se reduce por bisección cuando Newton se
+        sale de él. El punto de partida se interpola de la tabla de factores
+        de anualidad o se toma de `tir_inicial` (p. ej. la solución de una
+        corrida anterior en un barrido de sensibilidad).
+
+        Convenciones: capex == 0 -> 0 %; flujo <= 0 con capex > 0 -> -100 %
+        (la inversión nunca se recupera).
+        """
+        capex = np.asarray(capex, dtype=np.float64)
+        flujo = np.asarray(flujo_anual_neto, dtype=np.float64)
+        capex, flujo = np.broadcast_arrays(capex, flujo)
+        
+        tir = np.zeros(capex.shape)
+        validos = (capex > 0) & (flujo > 0)
+        tir[(capex > 0) & (flujo <= 0)] = -100.0
+        if not validos.any():
+            return tir
+        
+        c = capex[validos]
+        f = flujo[validos]
+        objetivo = c / f  # A(r) buscado
         
-        if capex == 0:
-            return Decimal("0")
+        # Intervalo con cambio de signo: A(-0.99) es enorme y A(f/c) < c/f
+        bajo = np.full(c.shape, -0.99)
+        alto = np.maximum(f / c, 1e-6)
         
-        tir = (flujo_anual_neto / capex) * Decimal("100")
-        return tir.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        if tir_inicial is not None:
+            r = np.broadcast_to(
+                np.asarray(tir_inicial, dtype=np.float64), capex.shape
+            )[validos] / 100
+        else:
+            # La malla es decreciente en A; np.interp necesita x creciente
+            r = np.interp(objetivo, _MALLA_ANUALIDAD[::-1], _MALLA_TASAS[::-1])
+        r = np.clip(r, bajo, alto)
+        
+        for _ in range(max_iteraciones):
+            anualidad, derivada = _anualidad_y_derivada(r)
+            g = anualidad - objetivo
+            # A es decreciente: g > 0 significa que la raíz está a la derecha
+            bajo = np.where(g > 0, r, bajo)
+            alto = np.where(g > 0, alto, r)
+            
+            with np.errstate(divide="ignore", invalid="ignore"):
+                nuevo = r - g / derivada
+            fuera = ~np.isfinite(nuevo) | (nuevo < bajo) | (nuevo > alto)
+            nuevo = np.where(fuera, (bajo + alto) / 2, nuevo)
+            
+            convergido = np.abs(nuevo - r) < tolerancia
+            r = nuevo
+            if convergido.all():
+                break
+        
+        tir[validos] = r * 100
+        return tir
     
     @staticmethod
     def calcular_periodo_retorno(
@@ -120,6 +242,7 @@ class CalculadoraFinanciera:
         return periodo_retorno.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
     
     @staticmethod
+    @cronometrado("financiero_resultados_completos")
     def calcular_resultados_completos(
         num_consultorios: int,
         num_equipos: int,
@@ -167,4 +290,130 @@ class CalculadoraFinanciera:
             "area_utilizada_m2": area_utilizada,
             "irradiacion_utilizada": irradiacion,
             "energia_generada": energia_generada
-        }
\ No newline at end of file
+        }
+    
+    @staticmethod
+    def calcular_resultados_lote(
+        num_consultorios,
+        num_equipos,
+        consumo,
+        irradiacion,
+        conciliar: bool = False
+    ) -> Dict[str, np.ndarray]:
+        """
+        Versión vectorizada de calcular_resultados_completos para muchos
+        proyectos a la vez (arreglos NumPy en float64).
+
+        Cada paso redondea a centavos igual que la versión Decimal. Con
+        `conciliar=True` se recalcula cada proyecto con Decimal y se agrega
+        la clave "discrepancias" con los campos que difieren en un centavo o más.
+        """
+        consultorios = np.asarray(num_consultorios, dtype=np.int64)
+        equipos = np.asarray(num_equipos, dtype=np.int64)
+        consumo = np.asarray(consumo, dtype=np.float64)
+        irradiacion = np.asarray(irradiacion, dtype=np.float64)
+        consultorios, equipos, consumo, irradiacion = np.broadcast_arrays(
+            consultorios, equipos, consumo, irradiacion
+        )
+        
+        # 1. Energía generada
+        area_total = consultorios * 20.0 + equipos * 5.0
+        area_disponible = area_total * 0.6
+        # area_disponible / AREA_PANEL == area_total * 3/8, exacto en float
+        num_paneles = np.trunc(area_total * 0.375).astype(np.int64)
+        potencia_instalada = float(POTENCIA_PANEL) * num_paneles
+        energia_generada = _redondear_centavos(
+            potencia_instalada * irradiacion * float(EFICIENCIA_SISTEMA)
+        )
+        
+        # 2. CAPEX y OPEX
+        costo_paneles = num_paneles * 300.0
+        costo_inversor = potencia_instalada * 800.0
+        capex = _redondear_centavos(
+            (costo_paneles + costo_inversor) * 1.3
+        )
+        opex = _redondear_centavos(capex * 0.015)
+        
+        # 3. Ahorro anual
+        ahorro_anual = _redondear_centavos(
+            np.minimum(consumo, energia_generada) * float(COSTO_KWH) * 12
+        )
+        
+        # 4. Indicadores financieros
+        flujo_anual_neto = ahorro_anual - opex
+        vpn = _redondear_centavos(-capex + flujo_anual_neto * FACTOR_ANUALIDAD)
+        
+        tir = _redondear_centavos(
+            CalculadoraFinanciera.calcular_tir_lote(capex, flujo_anual_neto)
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            periodo_retorno = np.where(
+                flujo_anual_neto <= 0, 999.0, _redondear_centavos(capex / flujo_anual_neto)
+            )
+        
+        resultados = {
+            "capex": capex,
+            "opex": opex,
+            "vpn": vpn,
+            "tir": tir,
+            "inversion": capex,
+            "ahorro_anual": ahorro_anual,
+            "periodo_retorno": periodo_retorno,
+            "num_paneles": num_paneles,
+            "potencia_instalada_kw": _redondear_centavos(potencia_instalada),
+            "area_utilizada_m2": _redondear_centavos(area_disponible),
+            "irradiacion_utilizada": irradiacion,
+            "energia_generada": energia_generada
+        }
+        
+        if conciliar:
+            resultados["discrepancias"] = CalculadoraFinanciera.conciliar_lote(
+                resultados, consultorios, equipos, consumo, irradiacion
+            )
+        
+        return resultados
+    
+    @staticmethod
+    def conciliar_lote(
+        resultados: Dict[str, np.ndarray],
+        num_consultorios,
+        num_equipos,
+        consumo,
+        irradiacion
+    ) -> List[Dict[str, any]]:
+        """
+        Compara los resultados del lote contra calcular_resultados_completos
+        (Decimal) proyecto por proyecto y devuelve las diferencias al centavo
+        """
+        discrepancias = []
+        centavo = Decimal("0.01")
+        
+        for i in range(len(resultados["capex"])):
+            esperado = CalculadoraFinanciera.calcular_resultados_completos(
+                num_consultorios=int(num_consultorios[i]),
+                num_equipos=int(num_equipos[i]),
+                consumo=Decimal(str(consumo[i])),
+                irradiacion=Decimal(str(irradiacion[i]))
+            )
+            
+            if esperado["num_paneles"] != int(resultados["num_paneles"][i]):
+                discrepancias.append({
+                    "indice": i,
+                    "campo": "num_paneles",
+                    "decimal": esperado["num_paneles"],
+                    "lote": int(resultados["num_paneles"][i])
+                })
+            
+            for campo in CAMPOS_MONETARIOS:
+                obtenido = Decimal(repr(float(resultados[campo][i]))).quantize(
+                    centavo, rounding=ROUND_HALF_UP
+                )
+                if obtenido != esperado[campo]:
+                    discrepancias.append({
+                        "indice": i,
+                        "campo": campo,
+                        "decimal": esperado[campo],
+                        "lote": obtenido
+                    })
+        
+        return discrepancias
@@ -0,0 +1,72 @@
+import json
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import IPS
+
+# Columnas que se pueden pedir con `fields`, en el orden de IPSResponse
+CAMPOS_IPS = ("id", "nombre", "tipo", "num_consultorios", "num_equipos", "id_ciudad")
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+# Filas serializadas por cada trozo enviado al cliente
+FILAS_POR_TROZO = 200
+
+
+def campos_solicitados(fields: Optional[str]) -> List[str]:
+    """
+    Convierte `fields=nombre,tipo` en la lista de columnas a consultar.
+    `id` siempre se incluye porque es el cursor de la paginación.
+    """
+    if not fields:
+        return list(CAMPOS_IPS)
+
+    pedidos = [campo.strip() for campo in fields.split(",") if campo.strip()]
+    invalidos = [campo for campo in pedidos if campo not in CAMPOS_IPS]
+    if invalidos:
+        raise ValueError(
+            f"Campos no válidos: {', '.join(invalidos)}. Disponibles: {', '.join(CAMPOS_IPS)}"
+        )
+    return [campo for campo in CAMPOS_IPS if campo == "id" or campo in pedidos]
+
+
+def consultar_pagina(db: Session, campos: Sequence[str], cursor: Optional[int] = None,
+                     limite: int = LIMITE_POR_DEFECTO, id_ciudad: Optional[int] = None,
+                     tipo: Optional[str] = None) -> Tuple[list, Optional[int]]:
+    """
+    Página de IPS ordenada por id, desde el id siguiente a `cursor`.
+
+    Pide `limite + 1` filas para saber si hay más sin un COUNT; devuelve las
+    filas (tuplas con sólo las columnas pedidas) y el cursor de la página
+    siguiente, o None si es la última. Con los filtros, la consulta usa los
+    índices compuestos (id_ciudad, id) y (tipo, id) de IPS.
+    """
+    consulta = select(*(getattr(IPS, campo) for campo in campos))
+    if cursor is not None:
+        consulta = consulta.where(IPS.id > cursor)
+    if id_ciudad is not None:
+        consulta = consulta.where(IPS.id_ciudad == id_ciudad)
+    if tipo is not None:
+        consulta = consulta.where(IPS.tipo == tipo)
+    consulta = consulta.order_by(IPS.id).limit(limite + 1)
+
+    filas = db.execute(consulta).all()
+    if len(filas) > limite:
+        filas = filas[:limite]
+        return filas, filas[-1].id
+    return filas, None
+
+
+def serializar_json(filas: list, campos: Sequence[str]) -> Iterator[bytes]:
+    """Arreglo JSON de la página, enviado por trozos de FILAS_POR_TROZO filas"""
+    yield b"["
+    for inicio in range(0, len(filas), FILAS_POR_TROZO):
+        trozo = ",".join(
+            json.dumps(dict(zip(campos, fila)), ensure_ascii=False)
+            for fila in filas[inicio:inicio + FILAS_POR_TROZO]
+        )
+        yield (trozo if inicio == 0 else "," + trozo).encode("utf-8")
+    yield b"]"
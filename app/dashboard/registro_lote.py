@@ -0,0 +1,163 @@
+from decimal import Decimal, ROUND_HALF_UP
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.models import IPS, Ciudad, Consumo, SistemaFV, ResultadosFinancieros
+from app.models.schemas import RegistroCompletoRequest
+from app.dashboard.calculadora_financiera import CalculadoraFinanciera
+from app.dashboard.cache_irradiacion import cache_irradiacion
+
+
+def _a_decimal(valor) -> Decimal:
+    return Decimal(repr(float(valor))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def insertar_con_ids(db: Session, modelo, filas: List[Dict]) -> List[int]:
+    """
+    Inserta varias filas y devuelve sus ids en el mismo orden.
+
+    Con motores que soportan INSERT ... RETURNING ordenado (SQLite, MariaDB,
+    PostgreSQL) es un solo INSERT de varias filas. MySQL no tiene RETURNING,
+    así que ahí se usa la unidad de trabajo del ORM en un solo flush para
+    obtener cada id de forma segura.
+    """
+    if not filas:
+        return []
+    dialecto = db.get_bind().dialect
+    if dialecto.insert_executemany_returning_sort_by_parameter_order:
+        resultado = db.execute(
+            insert(modelo).returning(modelo.id, sort_by_parameter_order=True), filas
+        )
+        return list(resultado.scalars())
+
+    objetos = [modelo(**fila) for fila in filas]
+    db.add_all(objetos)
+    db.flush()
+    return [obj.id for obj in objetos]
+
+
+def registrar_lote(db: Session, registros: List[RegistroCompletoRequest],
+                   tamano_bloque: int = 200) -> List[Dict]:
+    """
+    Registra muchas IPS con sus consumos, sistemas FV y resultados financieros.
+
+    La validación, la irradiación y los cálculos se resuelven para todo el
+    lote sin consultas por registro; las inserciones
+    van por bloques de `tamano_bloque` registros, cada bloque en su propia
+    transacción. Devuelve un resultado por registro (en el orden recibido);
+    si un bloque falla, sólo sus registros se marcan con el error.
+    """
+    resultados = [{"indice": i, "success": False} for i in range(len(registros))]
+
+    # 1. VALIDAR CIUDADES EN UNA CONSULTA
+    ids_ciudad = {r.id_ciudad for r in registros}
+    existentes = set(db.scalars(select(Ciudad.id).where(Ciudad.id.in_(ids_ciudad))))
+    validos = []
+    for i, r in enumerate(registros):
+        if r.id_ciudad not in existentes:
+            resultados[i]["error"] = f"Ciudad no encontrada: {r.id_ciudad}"
+        elif r.num_consultorios < 0 or r.num_equipos < 0 or r.consumo_kwh < 0:
+            resultados[i]["error"] = "Consultorios, equipos y consumo no pueden ser negativos"
+        else:
+            validos.append(i)
+    if not validos:
+        return resultados
+
+    # 2. IRRADIACIÓN DE TODO EL LOTE (desde el cache en memoria)
+    irradiacion = []
+    estimada = []
+    for i in validos:
+        valor, es_estimada = cache_irradiacion.obtener_o_defecto(
+            db, registros[i].id_ciudad, registros[i].mes_consumo
+        )
+        irradiacion.append(valor)
+        estimada.append(es_estimada)
+
+    # 3. RESULTADOS FINANCIEROS VECTORIZADOS
+    calculo = CalculadoraFinanciera.calcular_resultados_lote(
+        num_consultorios=[registros[i].num_consultorios for i in validos],
+        num_equipos=[registros[i].num_equipos for i in validos],
+        consumo=[registros[i].consumo_kwh for i in validos],
+        irradiacion=irradiacion
+    )
+
+    # 4. INSERCIONES POR BLOQUES
+    for inicio in range(0, len(validos), tamano_bloque):
+        posiciones = range(inicio, min(inicio + tamano_bloque, len(validos)))
+        indices = [validos[p] for p in posiciones]
+        try:
+            ids_ips = insertar_con_ids(db, IPS, [
+                {
+                    "nombre": registros[i].nombre_ips,
+                    "tipo": registros[i].tipo_ips,
+                    "num_consultorios": registros[i].num_consultorios,
+                    "num_equipos": registros[i].num_equipos,
+                    "id_ciudad": registros[i].id_ciudad
+                }
+                for i in indices
+            ])
+
+            ahora = datetime.utcnow()
+            db.execute(insert(Consumo), [
+                {
+                    "id_ips": id_ips,
+                    "mes": registros[i].mes_consumo,
+                    "año": registros[i].año_consumo,
+                    "consumo_kwh": registros[i].consumo_kwh,
+                    "fecha_registro": ahora
+                }
+                for i, id_ips in zip(indices, ids_ips)
+            ])
+
+            ids_sistema = insertar_con_ids(db, SistemaFV, [
+                {"id_ips": id_ips, "energia_generada_kwh_mes": _a_decimal(calculo["energia_generada"][p])}
+                for p, id_ips in zip(posiciones, ids_ips)
+            ])
+
+            db.execute(insert(ResultadosFinancieros), [
+                {
+                    "id_sistema_fv": id_sistema,
+                    "capex": _a_decimal(calculo["capex"][p]),
+                    "opex": _a_decimal(calculo["opex"][p]),
+                    "vpn": _a_decimal(calculo["vpn"][p]),
+                    "tir": _a_decimal(calculo["tir"][p]),
+                    "inversion_inicial": _a_decimal(calculo["inversion"][p])
+                }
+                for p, id_sistema in zip(posiciones, ids_sistema)
+            ])
+
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            for i in indices:
+                resultados[i]["error"] = f"Error en el registro: {str(e)}"
+            continue
+
+        for p, i, id_ips in zip(posiciones, indices, ids_ips):
+            energia = _a_decimal(calculo["energia_generada"][p])
+            resultados[i].update({
+                "success": True,
+                "id_ips": id_ips,
+                "irradiacion_kwh_m2": Decimal(irradiacion[p]),
+                "irradiacion_estimada": estimada[p],
+                "energia_generada_kwh_mes": energia,
+                "resultados_financieros": {
+                    "capex": _a_decimal(calculo["capex"][p]),
+                    "opex": _a_decimal(calculo["opex"][p]),
+                    "vpn": _a_decimal(calculo["vpn"][p]),
+                    "tir": _a_decimal(calculo["tir"][p]),
+                    "inversion": _a_decimal(calculo["inversion"][p]),
+                    "ahorro_anual": _a_decimal(calculo["ahorro_anual"][p]),
+                    "periodo_retorno": _a_decimal(calculo["periodo_retorno"][p]),
+                    "num_paneles": int(calculo["num_paneles"][p]),
+                    "potencia_instalada_kw": _a_decimal(calculo["potencia_instalada_kw"][p]),
+                    "area_utilizada_m2": _a_decimal(calculo["area_utilizada_m2"][p]),
+                    "irradiacion_utilizada": Decimal(irradiacion[p])
+                },
+                "es_viable": energia >= registros[i].consumo_kwh
+            })
+
+    return resultados
@@ -1,21 +1,82 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
+import logging
+import random
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL", "mysql+pymysql://root:@localhost:3306/solar-health")
+from app.db_config.settings import configuracion, ConfiguracionBD
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=True  # Equivalente a spring.jpa.show-sql=true
-)
+DATABASE_URL = configuracion.database_url
+
+logger = logging.getLogger(__name__)
+
+
+def opciones_pool(url: str, config: ConfiguracionBD = configuracion) -> dict:
+    """
+    Opciones comunes de create_engine / create_async_engine. SQLite no usa
+    un pool de tamaño fijo, así que ahí se omiten las opciones de tamaño.
+    """
+    opciones = {
+        "pool_pre_ping": config.db_pool_pre_ping,
+        "query_cache_size": config.db_cache_sentencias,
+        "echo": config.db_echo,
+    }
+    if make_url(url).get_backend_name() != "sqlite":
+        opciones.update(
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout,
+            pool_recycle=config.db_pool_recycle,
+        )
+    return opciones
+
+
+def registrar_consultas_lentas(engine, umbral_ms: float, muestreo: float = 1.0):
+    """
+    Registra (logging, nivel WARNING) las sentencias que tardan más de
+    `umbral_ms`, sólo una fracción `muestreo` de ellas. Reemplaza a
+    echo=True, que registra todas. El inicio se guarda en el contexto de
+    ejecución de cada sentencia, así una sentencia que falla no deja nada
+    pendiente en la conexión.
+    """
+    if umbral_ms <= 0 or muestreo <= 0:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _inicio(conn, cursor, statement, parameters, context, executemany):
+        context._inicio_consulta = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _fin(conn, cursor, statement, parameters, context, executemany):
+        milisegundos = (time.perf_counter() - context._inicio_consulta) * 1000
+        if milisegundos >= umbral_ms and (muestreo >= 1 or random.random() < muestreo):
+            sentencia = " ".join(statement.split())[:500]
+            logger.warning("Consulta lenta (%.0f ms): %s", milisegundos, sentencia)
+
+
+def crear_engine(url: str = None, config: ConfiguracionBD = configuracion, **opciones):
+    """Engine síncrono con el pool, el cache de sentencias y el log de la configuración"""
+    url = url or config.database_url
+    engine = create_engine(url, **{**opciones_pool(url, config), **opciones})
+    registrar_consultas_lentas(engine, config.db_lenta_ms, config.db_lenta_muestreo)
+    return engine
+
+
+engine = crear_engine()
+
+# Los GET pueden ir a una réplica de lectura; sin réplica comparten el engine
+if configuracion.database_url_lectura:
+    engine_lectura = crear_engine(configuracion.database_url_lectura)
+else:
+    engine_lectura = engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLectura = sessionmaker(autocommit=False, autoflush=False, bind=engine_lectura)
 
 Base = declarative_base()
 
@@ -25,4 +86,12 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_db_lectura():
+    """Dependency para obtener sesión de sólo lectura (réplica si está configurada)"""
+    db = SessionLectura()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,79 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db_config.database import opciones_pool, registrar_consultas_lentas
+from app.db_config.settings import configuracion, ConfiguracionBD
+
+# Driver async equivalente a cada driver síncrono
+DRIVERS_ASYNC = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def url_async(url: str) -> str:
+    """mysql+pymysql://... -> mysql+aiomysql://... (deja igual las URLs ya async)"""
+    url = make_url(url)
+    driver = DRIVERS_ASYNC.get(url.drivername)
+    if driver is not None:
+        url = url.set(drivername=driver)
+    return url.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = configuracion.async_database_url or url_async(configuracion.database_url)
+
+if configuracion.async_database_url_lectura or configuracion.database_url_lectura:
+    ASYNC_DATABASE_URL_LECTURA = (configuracion.async_database_url_lectura
+                                  or url_async(configuracion.database_url_lectura))
+else:
+    ASYNC_DATABASE_URL_LECTURA = None
+
+_engines = {}
+_sesiones = {}
+
+
+def crear_engine_async(url: str = None, config: ConfiguracionBD = configuracion, **opciones):
+    """AsyncEngine con el pool, el cache de sentencias y el log de la configuración"""
+    url = url or ASYNC_DATABASE_URL
+    engine = create_async_engine(url, **{**opciones_pool(url, config), **opciones})
+    registrar_consultas_lentas(engine.sync_engine, config.db_lenta_ms, config.db_lenta_muestreo)
+    return engine
+
+
+def obtener_engine_async(lectura: bool = False):
+    """
+    Engine async del proceso (o el de la réplica de lectura), creado en el
+    primer uso: importar este módulo no exige tener instalado aiomysql.
+    """
+    clave = "lectura" if lectura and ASYNC_DATABASE_URL_LECTURA else "principal"
+    if clave not in _engines:
+        url = ASYNC_DATABASE_URL_LECTURA if clave == "lectura" else ASYNC_DATABASE_URL
+        _engines[clave] = crear_engine_async(url)
+        _sesiones[clave] = async_sessionmaker(_engines[clave], expire_on_commit=False, autoflush=False)
+    return _engines[clave], _sesiones[clave]
+
+
+async def get_db_async():
+    """Dependency para obtener sesión async de base de datos"""
+    _, Sesion = obtener_engine_async()
+    async with Sesion() as db:
+        yield db
+
+
+async def get_db_lectura_async():
+    """Dependency para obtener sesión async de sólo lectura (réplica si está configurada)"""
+    _, Sesion = obtener_engine_async(lectura=True)
+    async with Sesion() as db:
+        yield db
+
+
+async def cerrar_engine_async():
+    """Cierra las conexiones de los pools (evento shutdown)"""
+    for engine in _engines.values():
+        await engine.dispose()
+    _engines.clear()
+    _sesiones.clear()
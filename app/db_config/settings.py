@@ -0,0 +1,40 @@
+from typing import Optional
+
+from pydantic_settings import BaseSettings
+
+
+class ConfiguracionBD(BaseSettings):
+    """
+    Configuración de la base de datos, leída de variables de entorno o del
+    archivo `.env` (DATABASE_URL, DB_POOL_SIZE, DB_ECHO, ...).
+    """
+
+    database_url: str = "mysql+pymysql://root:@localhost:3306/solar-health"
+    # Réplica de sólo lectura para los GET; si no se define se usa la principal
+    database_url_lectura: Optional[str] = None
+    async_database_url: Optional[str] = None
+    async_database_url_lectura: Optional[str] = None
+    db_modo: str = "sync"
+
+    # Pool de conexiones
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 3600
+    db_pool_pre_ping: bool = True
+
+    # Entradas del cache de sentencias compiladas de SQLAlchemy
+    db_cache_sentencias: int = 500
+
+    # Log de SQL: echo completo sólo para desarrollo; en producción se
+    # registran las consultas lentas, muestreadas
+    db_echo: bool = False
+    db_lenta_ms: float = 200
+    db_lenta_muestreo: float = 1.0
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+
+configuracion = ConfiguracionBD()
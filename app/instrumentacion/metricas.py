@@ -0,0 +1,242 @@
+"""
+Métricas en formato Prometheus para ambos servicios
+===================================================
+- `Histograma` / `Contador`: series con etiquetas y buckets fijos; cada
+  combinación de etiquetas reserva su arreglo de buckets la primera vez y
+  después sólo se incrementan enteros.
+- `Medidor`: valor calculado al momento de exponer (p. ej. la tasa de
+  aciertos de un cache).
+- `MiddlewareMetricas`: middleware ASGI puro que mide la latencia de cada
+  petición por método, ruta (la plantilla, no la URL) y código de estado.
+- `observar_tramo` / `cronometrado`: tiempos de tramos internos (predicción,
+  construcción de features, cálculos financieros, flush a la BD).
+- `router_metricas`: expone `GET /metrics`.
+
+Las métricas son por proceso: con varios workers, Prometheus debe
+recolectar cada uno (o usar un agregador).
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+# Buckets en segundos: de 0.5 ms a 10 s
+BUCKETS_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _formatear_etiquetas(nombres, valores, extra: str = "") -> str:
+    partes = [f'{n}="{str(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+class Histograma:
+    """Histograma acumulativo con buckets fijos (sumas y conteos por etiquetas)"""
+
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, etiquetas=()):
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                # [conteo por bucket (+Inf al final), suma, total]
+                serie = self._series[etiquetas] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exponer(self) -> list:
+        with self._lock:
+            copia = [(etq, list(s[0]), s[1], s[2]) for etq, s in self._series.items()]
+        lineas = []
+        for etiquetas, conteos, suma, total in copia:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = 'le="+Inf"' if limite == float("inf") else f'le="{limite!r}"'
+                lineas.append(
+                    f"{self.nombre}_bucket{_formatear_etiquetas(self.etiquetas, etiquetas, le)} {acumulado}"
+                )
+            sufijo = _formatear_etiquetas(self.etiquetas, etiquetas)
+            lineas.append(f"{self.nombre}_sum{sufijo} {suma}")
+            lineas.append(f"{self.nombre}_count{sufijo} {total}")
+        return lineas
+
+
+class Contador:
+    """Contador monotónico por etiquetas"""
+
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, cantidad: float = 1, etiquetas=()):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + cantidad
+
+    def exponer(self) -> list:
+        with self._lock:
+            copia = list(self._valores.items())
+        return [f"{self.nombre}{_formatear_etiquetas(self.etiquetas, etq)} {valor}"
+                for etq, valor in copia]
+
+
+class Medidor:
+    """Valor instantáneo que se calcula con `funcion()` al exponer /metrics"""
+
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, ayuda: str, funcion):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.funcion = funcion
+
+    def exponer(self) -> list:
+        valor = self.funcion()
+        return [] if valor is None else [f"{self.nombre} {valor}"]
+
+
+class RegistroMetricas:
+    """Conjunto de métricas del proceso, expuestas juntas en /metrics"""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _agregar(self, clase, nombre, *args, **kwargs):
+        with self._lock:
+            metrica = self._metricas.get(nombre)
+            if metrica is None:
+                metrica = self._metricas[nombre] = clase(nombre, *args, **kwargs)
+            return metrica
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas=(), buckets=BUCKETS_LATENCIA) -> Histograma:
+        return self._agregar(Histograma, nombre, ayuda, etiquetas, buckets)
+
+    def contador(self, nombre: str, ayuda: str, etiquetas=()) -> Contador:
+        return self._agregar(Contador, nombre, ayuda, etiquetas)
+
+    def medidor(self, nombre: str, ayuda: str, funcion) -> Medidor:
+        return self._agregar(Medidor, nombre, ayuda, funcion)
+
+    def exponer(self) -> str:
+        lineas = []
+        for metrica in list(self._metricas.values()):
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(metrica.exponer())
+        return "\n".join(lineas) + "\n"
+
+
+metricas = RegistroMetricas()
+
+LATENCIA_HTTP = metricas.histograma(
+    "http_peticion_duracion_segundos",
+    "Duración de las peticiones HTTP por método, ruta y código de estado",
+    etiquetas=("metodo", "ruta", "estado")
+)
+
+DURACION_TRAMO = metricas.histograma(
+    "tramo_duracion_segundos",
+    "Duración de los tramos internos instrumentados",
+    etiquetas=("tramo",)
+)
+
+
+def observar_tramo(tramo: str, inicio: float):
+    """Registra el tiempo desde `inicio` (time.perf_counter()) para el tramo"""
+    DURACION_TRAMO.observar(time.perf_counter() - inicio, (tramo,))
+
+
+def cronometrado(tramo: str):
+    """Decorador que mide cada llamada de la función como el tramo indicado"""
+    etiquetas = (tramo,)
+
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                DURACION_TRAMO.observar(time.perf_counter() - inicio, etiquetas)
+        return envoltura
+    return decorador
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI que observa la latencia de cada petición HTTP.
+
+    La ruta se etiqueta con la plantilla (`/api/ips/{id}`) para que la
+    cardinalidad no dependa de los ids; las URLs sin ruta van como
+    "sin_ruta".
+    """
+
+    def __init__(self, app, histograma: Histograma = LATENCIA_HTTP):
+        self.app = app
+        self.histograma = histograma
+        self._rutas = None
+
+    def _plantilla(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "sin_ruta"
+        if self._rutas is None or endpoint not in self._rutas:
+            # Se arma una vez (y de nuevo sólo si aparece una ruta agregada después)
+            aplicacion = scope.get("app")
+            self._rutas = {
+                ruta.endpoint: ruta.path
+                for ruta in getattr(aplicacion, "routes", ())
+                if hasattr(ruta, "endpoint")
+            }
+        return self._rutas.get(endpoint, "sin_ruta")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estado = 500
+        inicio = time.perf_counter()
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            self.histograma.observar(
+                time.perf_counter() - inicio,
+                (scope["method"], self._plantilla(scope), estado)
+            )
+
+
+router_metricas = APIRouter(tags=["metricas"])
+
+@router_metricas.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def exponer_metricas():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    return PlainTextResponse(metricas.exponer(), media_type="text/plain; version=0.0.4")
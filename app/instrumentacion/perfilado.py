@@ -0,0 +1,221 @@
+"""
+Perfilado bajo demanda con muestreo de pilas
+============================================
+Desactivado por defecto: si no se configura, `instalar_perfilado` no agrega
+ni el middleware ni las rutas, así que no hay costo alguno.
+
+- PERFIL_MUESTREO: fracción de peticiones a perfilar (p. ej. 0.01).
+- PERFIL_TOKEN: perfila cualquier petición que traiga la cabecera
+  `X-Perfilar: <token>`; el mismo token protege las rutas /perfilado, que
+  sólo se montan si está definido (las pilas exponen rutas de archivos y
+  nombres de funciones). Con sólo PERFIL_MUESTREO se toman capturas pero no
+  hay forma de descargarlas.
+- PERFIL_INTERVALO_MS: intervalo entre muestras (5 ms por defecto).
+- PERFIL_MAX_CAPTURAS: capturas que se guardan en memoria (las últimas).
+
+Mientras dura la petición perfilada, un hilo toma las pilas de todos los
+hilos del proceso (el event loop y el threadpool donde corren las rutas
+`def`) y descarta las que están ociosas. El resultado está en formato de
+pilas colapsadas, listo para flamegraph.pl o speedscope:
+
+    curl -H "X-Perfilar: $TOKEN" .../api/predict/monthly ...   # -> X-Perfil-Id
+    curl -H "X-Perfilar: $TOKEN" .../perfilado/capturas/<id> > perfil.txt
+    flamegraph.pl perfil.txt > perfil.svg
+
+Las muestras son de todo el proceso: si hay otras peticiones en curso
+también aparecen en la captura.
+"""
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from itertools import count
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+PERFIL_MUESTREO = float(os.getenv("PERFIL_MUESTREO", "0"))
+PERFIL_TOKEN = os.getenv("PERFIL_TOKEN", "")
+PERFIL_INTERVALO = float(os.getenv("PERFIL_INTERVALO_MS", "5")) / 1000
+PERFIL_MAX_CAPTURAS = int(os.getenv("PERFIL_MAX_CAPTURAS", "20"))
+
+CABECERA_PERFILAR = b"x-perfilar"
+
+# Hojas de pila que indican un hilo esperando trabajo
+_FUNCIONES_OCIOSAS = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+}
+
+
+def _etiqueta(codigo) -> str:
+    return f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+
+
+class MuestreadorPilas:
+    """Hilo que toma las pilas de todos los hilos cada `intervalo` segundos"""
+
+    def __init__(self, intervalo: float = PERFIL_INTERVALO):
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self.muestras = 0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, name="perfilado", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self) -> Counter:
+        self._detener.set()
+        self._hilo.join()
+        return self.pilas
+
+    def _ejecutar(self):
+        propio = threading.get_ident()
+        nombres = {}
+        while not self._detener.is_set():
+            for id_hilo, frame in sys._current_frames().items():
+                if id_hilo == propio:
+                    continue
+                codigo = frame.f_code
+                if (os.path.basename(codigo.co_filename), codigo.co_name) in _FUNCIONES_OCIOSAS:
+                    continue
+                pila = []
+                while frame is not None:
+                    pila.append(_etiqueta(frame.f_code))
+                    frame = frame.f_back
+                if id_hilo not in nombres:
+                    hilo = threading._active.get(id_hilo)
+                    nombres[id_hilo] = hilo.name if hilo is not None else str(id_hilo)
+                pila.append(nombres[id_hilo])
+                pila.reverse()
+                self.pilas[";".join(pila)] += 1
+            self.muestras += 1
+            self._detener.wait(self.intervalo)
+
+
+class Captura:
+    __slots__ = ("id", "metodo", "ruta", "inicio", "duracion", "muestras", "pilas")
+
+    def __init__(self, id, metodo, ruta, inicio, duracion, muestras, pilas):
+        self.id = id
+        self.metodo = metodo
+        self.ruta = ruta
+        self.inicio = inicio
+        self.duracion = duracion
+        self.muestras = muestras
+        self.pilas = pilas
+
+    def resumen(self) -> dict:
+        return {
+            "id": self.id,
+            "metodo": self.metodo,
+            "ruta": self.ruta,
+            "inicio": self.inicio,
+            "duracion_ms": round(self.duracion * 1000, 2),
+            "muestras": self.muestras,
+        }
+
+    def colapsado(self) -> str:
+        return "".join(f"{pila} {n}\n" for pila, n in self.pilas.most_common())
+
+
+capturas = deque(maxlen=PERFIL_MAX_CAPTURAS)
+_ids = count(1)
+# Una sola captura a la vez: las muestras son de todo el proceso
+_lock_captura = threading.Lock()
+
+
+class MiddlewarePerfilado:
+    """Middleware ASGI que perfila las peticiones elegidas (muestreo o cabecera)"""
+
+    def __init__(self, app, muestreo: float = PERFIL_MUESTREO, token: str = PERFIL_TOKEN,
+                 intervalo: float = PERFIL_INTERVALO):
+        self.app = app
+        self.muestreo = muestreo
+        self.token = token.encode() if token else None
+        self.intervalo = intervalo
+
+    def _elegida(self, scope) -> bool:
+        if self.token is not None:
+            for nombre, valor in scope["headers"]:
+                if nombre == CABECERA_PERFILAR:
+                    return hmac.compare_digest(valor, self.token)
+        return self.muestreo > 0 and random.random() < self.muestreo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._elegida(scope):
+            await self.app(scope, receive, send)
+            return
+        if not _lock_captura.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        id_captura = next(_ids)
+        inicio_epoch = time.time()
+        inicio = time.perf_counter()
+        muestreador = MuestreadorPilas(self.intervalo)
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                mensaje["headers"] = list(mensaje.get("headers", [])) + [
+                    (b"x-perfil-id", str(id_captura).encode())
+                ]
+            await send(mensaje)
+
+        muestreador.iniciar()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            pilas = muestreador.detener()
+            capturas.append(Captura(
+                id_captura, scope["method"], scope["path"], inicio_epoch,
+                time.perf_counter() - inicio, muestreador.muestras, pilas
+            ))
+            _lock_captura.release()
+
+
+router_perfilado = APIRouter(prefix="/perfilado", tags=["perfilado"], include_in_schema=False)
+
+
+def _verificar_token(x_perfilar: Optional[str]):
+    # Sin token configurado nadie puede leer las capturas
+    if not PERFIL_TOKEN or not hmac.compare_digest((x_perfilar or "").encode(), PERFIL_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Token de perfilado inválido")
+
+
+@router_perfilado.get("/capturas")
+def listar_capturas(x_perfilar: Optional[str] = Header(None)):
+    """Capturas guardadas (las más recientes al final)"""
+    _verificar_token(x_perfilar)
+    return [c.resumen() for c in list(capturas)]
+
+
+@router_perfilado.get("/capturas/{id}", response_class=PlainTextResponse)
+def obtener_captura(id: int, x_perfilar: Optional[str] = Header(None)):
+    """Pilas colapsadas de la captura (una línea por pila: `a;b;c muestras`)"""
+    _verificar_token(x_perfilar)
+    for captura in list(capturas):
+        if captura.id == id:
+            return PlainTextResponse(captura.colapsado())
+    raise HTTPException(status_code=404, detail="Captura no encontrada")
+
+
+def instalar_perfilado(app):
+    """
+    Agrega el middleware sólo si el perfilado está configurado, y las rutas
+    /perfilado sólo si además hay PERFIL_TOKEN para protegerlas
+    """
+    if PERFIL_MUESTREO <= 0 and not PERFIL_TOKEN:
+        return False
+    app.add_middleware(MiddlewarePerfilado)
+    if PERFIL_TOKEN:
+        app.include_router(router_perfilado)
+    print(f"Perfilado activo (muestreo={PERFIL_MUESTREO}, token={'sí' if PERFIL_TOKEN else 'no'})")
+    return True
@@ -1,12 +1,26 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes.routers import router_departamentos, router_ciudades, router_ips, router_registro
-from app.db_config.database import engine
+from app.routes.routers import router_admin
+from app.db_config.database import engine, SessionLocal
+from app.db_config.settings import configuracion
+from app.dashboard.cache_irradiacion import cache_irradiacion
 from app.models.models import Base
+from app.instrumentacion.metricas import MiddlewareMetricas, router_metricas
+from app.instrumentacion.perfilado import instalar_perfilado
 from ml_app.routes.peak_shaving import router as router_peak_shaving
+from app.routes.preparacion import router_preparacion
+from ml_app.dashboard.calentamiento import calentador
 
 import os
 
+# DB_MODO=async sirve los routers con AsyncSession (aiomysql) en vez del threadpool
+DB_MODO = configuracion.db_modo.lower()
+if DB_MODO == "async":
+    from app.routes.routers_async import router_departamentos, router_ciudades, router_ips, router_registro
+    from app.db_config.database_async import cerrar_engine_async
+else:
+    from app.routes.routers import router_departamentos, router_ciudades, router_ips, router_registro
+
 # Crear las tablas (equivalente a JPA)
 # Base.metadata.create_all(bind=engine)  # Descomenta si quieres crear tablas automáticamente
 
@@ -24,14 +38,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # El navegador sólo deja leer las cabeceras listadas aquí (paginación de /api/ips)
+    expose_headers=["X-Siguiente-Cursor"],
 )
 
+# Latencia por ruta, expuesta en /metrics
+app.add_middleware(MiddlewareMetricas)
+
+# Perfilado bajo demanda (sólo si PERFIL_MUESTREO o PERFIL_TOKEN están definidos)
+instalar_perfilado(app)
+
 # Incluir routers
 app.include_router(router_departamentos)
 app.include_router(router_ciudades)
 app.include_router(router_ips)
 app.include_router(router_registro)
+app.include_router(router_admin)
+app.include_router(router_metricas)
 app.include_router(router_peak_shaving)
+app.include_router(router_preparacion)
+
+# Cargar en memoria la tabla de irradiación al arrancar
+@app.on_event("startup")
+def precargar_caches():
+    try:
+        with SessionLocal() as db:
+            cache_irradiacion.cargar(db)
+    except Exception as e:
+        # Sin BD al arrancar: el cache se carga en la primera consulta
+        print(f"Advertencia: no se pudo precargar la irradiación: {e}")
+
+# Modelo de peak shaving: predicción de prueba en segundo plano. Es opcional
+# en esta API: /ready sólo depende de la base de datos
+@app.on_event("startup")
+def calentar_modelos():
+    calentador.iniciar_en_segundo_plano()
+
+@app.on_event("shutdown")
+async def cerrar_conexiones():
+    if DB_MODO == "async":
+        await cerrar_engine_async()
 
 # Endpoint raíz
 @app.get("/")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from decimal import Decimal
@@ -42,6 +42,12 @@ class IPS(Base):
     consumos = relationship("Consumo", back_populates="ips")
     sistemas_fv = relationship("SistemaFV", back_populates="ips")
 
+    # Índices para la paginación por id con filtro de ciudad o tipo
+    __table_args__ = (
+        Index("ix_ips_ciudad_id", "id_ciudad", "id"),
+        Index("ix_ips_tipo_id", "tipo", "id"),
+    )
+
 
 class Consumo(Base):
     __tablename__ = "consumo"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 from datetime import datetime
 
@@ -89,7 +89,31 @@ class RegistroCompletoResponse(BaseModel):
     ips_registrada: Optional[IPSResponse] = None
     consumo_registrado: Optional[ConsumoResponse] = None
     irradiacion_kwh_m2: Optional[Decimal] = None
+    irradiacion_estimada: Optional[bool] = None
     energia_generada_kwh_mes: Optional[Decimal] = None
     resultados_financieros: Optional[ResultadosFinancierosData] = None
     es_viable: Optional[bool] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+
+# Schemas para Registro por Lotes
+class RegistroLoteRequest(BaseModel):
+    registros: List[RegistroCompletoRequest] = Field(..., min_length=1, max_length=5000)
+    tamano_bloque: int = Field(200, ge=1, le=1000)
+
+class RegistroLoteItem(BaseModel):
+    indice: int
+    success: bool
+    id_ips: Optional[int] = None
+    irradiacion_kwh_m2: Optional[Decimal] = None
+    irradiacion_estimada: Optional[bool] = None
+    energia_generada_kwh_mes: Optional[Decimal] = None
+    resultados_financieros: Optional[ResultadosFinancierosData] = None
+    es_viable: Optional[bool] = None
+    error: Optional[str] = None
+
+class RegistroLoteResponse(BaseModel):
+    success: bool
+    total: int
+    registrados: int
+    fallidos: int
+    resultados: List[RegistroLoteItem]
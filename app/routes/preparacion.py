@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db_config.database import get_db
+from ml_app.dashboard.calentamiento import calentador
+
+router_preparacion = APIRouter(tags=["preparacion"])
+
+
+@router_preparacion.get("/ready")
+def readiness(db: Session = Depends(get_db)):
+    """
+    Readiness de la API de base de datos: 200 si la base responde, 503 si no.
+    El modelo de peak shaving es opcional aquí; su estado de carga se
+    informa en `tareas` pero no cambia la respuesta.
+    """
+    try:
+        db.execute(text("SELECT 1"))
+    except Exception as e:
+        base_datos = {"estado": "error", "error": f"{type(e).__name__}: {e}"}
+    else:
+        base_datos = {"estado": "listo"}
+
+    contenido = {
+        "ready": base_datos["estado"] == "listo",
+        "base_datos": base_datos,
+        **calentador.estado(),
+    }
+    return JSONResponse(contenido, status_code=200 if contenido["ready"] else 503)
@@ -1,57 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from decimal import Decimal
+from typing import List, Optional
 from datetime import datetime
+import hmac
+import os
+import time
 
-from app.db_config.database import get_db
-from app.models.models import Departamento, Ciudad, IPS, Consumo, Irradiacion, SistemaFV, ResultadosFinancieros
+from app.db_config.database import get_db, get_db_lectura
+from app.models.models import Departamento, IPS, Consumo, SistemaFV, ResultadosFinancieros
 from app.models.schemas import (
     DepartamentoResponse, CiudadResponse, IPSResponse, IPSCreate,
     RegistroCompletoRequest, RegistroCompletoResponse, ResultadosFinancierosData,
-    ConsumoResponse
+    ConsumoResponse, RegistroLoteRequest, RegistroLoteResponse
 )
 from app.dashboard.calculadora_financiera import CalculadoraFinanciera
+from app.dashboard.registro_lote import registrar_lote
+from app.dashboard.cache_irradiacion import cache_irradiacion
+from app.dashboard.cache_referencias import cache_referencias, respuesta_json
+from app.instrumentacion.metricas import observar_tramo
+from app.dashboard.paginacion_ips import (
+    LIMITE_POR_DEFECTO, LIMITE_MAXIMO, campos_solicitados, consultar_pagina, serializar_json
+)
 
 # Router para Departamentos
 router_departamentos = APIRouter(prefix="/api/departamentos", tags=["departamentos"])
 
 @router_departamentos.get("/", response_model=List[DepartamentoResponse])
-def get_departamentos(db: Session = Depends(get_db)):
-    """Obtener todos los departamentos"""
-    departamentos = db.query(Departamento).all()
-    return departamentos
+def get_departamentos(db: Session = Depends(get_db_lectura),
+                      if_none_match: Optional[str] = Header(None)):
+    """Obtener todos los departamentos (JSON cacheado con ETag)"""
+    return respuesta_json(cache_referencias.departamentos(db), if_none_match)
 
 @router_departamentos.get("/{id}", response_model=DepartamentoResponse)
-def get_departamento_by_id(id: int, db: Session = Depends(get_db)):
+def get_departamento_by_id(id: int, db: Session = Depends(get_db_lectura)):
     """Obtener un departamento por ID"""
     departamento = db.query(Departamento).filter(Departamento.id == id).first()
     if not departamento:
         raise HTTPException(status_code=404, detail="Departamento no encontrado")
     return departamento
 
+@router_departamentos.get("/{id}/ciudades", response_model=List[CiudadResponse])
+def get_ciudades_by_departamento(id: int, db: Session = Depends(get_db_lectura),
+                                 if_none_match: Optional[str] = Header(None)):
+    """Obtener las ciudades de un departamento (JSON cacheado con ETag)"""
+    entrada = cache_referencias.ciudades_de_departamento(db, id)
+    if entrada is None:
+        raise HTTPException(status_code=404, detail="Departamento no encontrado")
+    return respuesta_json(entrada, if_none_match)
+
 
 # Router para Ciudades
 router_ciudades = APIRouter(prefix="/api/ciudades", tags=["ciudades"])
 
 @router_ciudades.get("/", response_model=List[CiudadResponse])
-def get_ciudades(db: Session = Depends(get_db)):
-    """Obtener todas las ciudades"""
-    ciudades = db.query(Ciudad).all()
-    return ciudades
+def get_ciudades(db: Session = Depends(get_db_lectura),
+                 if_none_match: Optional[str] = Header(None)):
+    """Obtener todas las ciudades (JSON cacheado con ETag)"""
+    return respuesta_json(cache_referencias.ciudades(db), if_none_match)
 
 
 # Router para IPS
 router_ips = APIRouter(prefix="/api/ips", tags=["ips"])
 
-@router_ips.get("/", response_model=List[IPSResponse])
-def get_ips(db: Session = Depends(get_db)):
-    """Obtener todas las IPS"""
-    ips_list = db.query(IPS).all()
-    return ips_list
+@router_ips.get("/")
+def get_ips(
+    cursor: Optional[int] = Query(None, description="id de la última IPS de la página anterior"),
+    limite: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    fields: Optional[str] = Query(None, description="Columnas separadas por coma, p. ej. nombre,tipo"),
+    id_ciudad: Optional[int] = None,
+    tipo: Optional[str] = None,
+    db: Session = Depends(get_db_lectura)
+):
+    """
+    Obtener las IPS paginadas por id (`limite` filas, 100 por defecto). Si
+    hay más resultados, la cabecera X-Siguiente-Cursor trae el valor de
+    `cursor` para la página siguiente.
+
+    Devuelve un arreglo JSON de objetos con sólo las columnas pedidas en
+    `fields` (`id` siempre incluido); sin `fields`, las de IPSResponse.
+    """
+    try:
+        campos = campos_solicitados(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filas, siguiente = consultar_pagina(db, campos, cursor, limite, id_ciudad, tipo)
+    cabeceras = {"X-Siguiente-Cursor": str(siguiente)} if siguiente is not None else {}
+    return StreamingResponse(serializar_json(filas, campos),
+                             media_type="application/json", headers=cabeceras)
 
 @router_ips.get("/{id}", response_model=IPSResponse)
-def get_ips_by_id(id: int, db: Session = Depends(get_db)):
+def get_ips_by_id(id: int, db: Session = Depends(get_db_lectura)):
     """Obtener una IPS por ID"""
     ips = db.query(IPS).filter(IPS.id == id).first()
     if not ips:
@@ -84,6 +124,14 @@ def registro_completo(datos: RegistroCompletoRequest, db: Session = Depends(get_
     """
     Endpoint principal: Registro completo de IPS con cálculos financieros
     """
+    return procesar_registro_completo(db, datos)
+
+
+def procesar_registro_completo(db: Session, datos: RegistroCompletoRequest) -> RegistroCompletoResponse:
+    """
+    Registra IPS, consumo, sistema FV y resultados financieros en una sola
+    transacción. Compartido por el router síncrono y el async (run_sync).
+    """
     try:
         # 1. REGISTRAR IPS
         nueva_ips = IPS(
@@ -94,7 +142,9 @@ def registro_completo(datos: RegistroCompletoRequest, db: Session = Depends(get_
             id_ciudad=datos.id_ciudad
         )
         db.add(nueva_ips)
+        inicio = time.perf_counter()
         db.flush()
+        observar_tramo("registro_flush_ips", inicio)
         
         # 2. REGISTRAR CONSUMO
         nuevo_consumo = Consumo(
@@ -105,15 +155,14 @@ def registro_completo(datos: RegistroCompletoRequest, db: Session = Depends(get_
             fecha_registro=datetime.utcnow()
         )
         db.add(nuevo_consumo)
+        inicio = time.perf_counter()
         db.flush()
+        observar_tramo("registro_flush_consumo", inicio)
         
-        # 3. OBTENER IRRADIACIÓN REAL DE LA BD
-        irradiacion_obj = db.query(Irradiacion).filter(
-            Irradiacion.id_ciudad == datos.id_ciudad,
-            Irradiacion.mes == datos.mes_consumo
-        ).first()
-        
-        irradiacion = irradiacion_obj.irradiacion_kwh_m2_mes if irradiacion_obj else Decimal("4.5")
+        # 3. OBTENER IRRADIACIÓN (cache en memoria de la tabla irradiacion)
+        irradiacion, irradiacion_estimada = cache_irradiacion.obtener_o_defecto(
+            db, datos.id_ciudad, datos.mes_consumo
+        )
         
         # 4. CALCULAR TODOS LOS RESULTADOS FINANCIEROS
         resultados = CalculadoraFinanciera.calcular_resultados_completos(
@@ -131,7 +180,9 @@ def registro_completo(datos: RegistroCompletoRequest, db: Session = Depends(get_
             energia_generada_kwh_mes=energia_generada
         )
         db.add(nuevo_sistema)
+        inicio = time.perf_counter()
         db.flush()
+        observar_tramo("registro_flush_sistema_fv", inicio)
         
         # 6. REGISTRAR RESULTADOS FINANCIEROS
         nuevos_resultados = ResultadosFinancieros(
@@ -145,7 +196,9 @@ def registro_completo(datos: RegistroCompletoRequest, db: Session = Depends(get_
         db.add(nuevos_resultados)
         
         # 7. CONFIRMAR TRANSACCIÓN
+        inicio = time.perf_counter()
         db.commit()
+        observar_tramo("registro_commit", inicio)
         
         # 8. PREPARAR RESPUESTA
         es_viable = energia_generada >= datos.consumo_kwh
@@ -156,6 +209,7 @@ def registro_completo(datos: RegistroCompletoRequest, db: Session = Depends(get_
             ips_registrada=IPSResponse.model_validate(nueva_ips),
             consumo_registrado=ConsumoResponse.model_validate(nuevo_consumo),
             irradiacion_kwh_m2=irradiacion,
+            irradiacion_estimada=irradiacion_estimada,
             energia_generada_kwh_mes=energia_generada,
             resultados_financieros=ResultadosFinancierosData(**resultados),
             es_viable=es_viable
@@ -166,4 +220,61 @@ def registro_completo(datos: RegistroCompletoRequest, db: Session = Depends(get_
         return RegistroCompletoResponse(
             success=False,
             error=f"Error en el registro: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router_registro.post("/lote", response_model=RegistroLoteResponse)
+def registro_lote(datos: RegistroLoteRequest, db: Session = Depends(get_db)):
+    """
+    Registro completo de muchas IPS en una sola petición.
+    La irradiación se consulta una vez para todo el lote, los cálculos
+    financieros se hacen vectorizados y las inserciones van por bloques de
+    `tamano_bloque` registros, cada bloque en su propia transacción.
+    Cada registro trae su propio resultado o error.
+    """
+    resultados = registrar_lote(db, datos.registros, datos.tamano_bloque)
+    registrados = sum(1 for r in resultados if r["success"])
+
+    return RegistroLoteResponse(
+        success=registrados == len(resultados),
+        total=len(resultados),
+        registrados=registrados,
+        fallidos=len(resultados) - registrados,
+        resultados=resultados
+    )
+
+
+# Router de administración
+router_admin = APIRouter(prefix="/api/admin", tags=["admin"])
+
+# Protege las rutas que cambian el estado del servidor (cabecera X-Admin-Token)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def verificar_token_admin(x_admin_token: Optional[str] = Header(None)):
+    # Sin token configurado las rutas de administración quedan cerradas
+    if not ADMIN_TOKEN or not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+
+@router_admin.get("/cache/irradiacion")
+def estado_cache_irradiacion():
+    """Aciertos, fallos y pares (ciudad, mes) sin irradiación registrada"""
+    return cache_irradiacion.estadisticas()
+
+@router_admin.post("/cache/irradiacion/invalidar", dependencies=[Depends(verificar_token_admin)])
+def invalidar_cache_irradiacion():
+    """Fuerza la recarga de la tabla irradiacion en la próxima consulta"""
+    cache_irradiacion.invalidar()
+    return {"success": True, "message": "Cache de irradiación invalidado"}
+
+@router_admin.get("/cache/referencias")
+def estado_cache_referencias():
+    """Versiones (ETag) y reconstrucciones del cache de departamentos y ciudades"""
+    return cache_referencias.estadisticas()
+
+@router_admin.post("/cache/referencias/invalidar", dependencies=[Depends(verificar_token_admin)])
+def invalidar_cache_referencias():
+    """Fuerza la reconstrucción de departamentos y ciudades en la próxima consulta"""
+    cache_referencias.invalidar()
+    return {"success": True, "message": "Cache de referencias invalidado"}
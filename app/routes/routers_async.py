@@ -0,0 +1,121 @@
+"""
+Versión async de los routers de `routers.py` (DB_MODO=async).
+
+Las consultas simples y el cache de referencias (ver sus métodos `*_async`)
+usan AsyncSession directamente. La paginación se reutiliza con `run_sync`,
+que la ejecuta en un greenlet sobre la misma conexión async sin ocupar un
+hilo del threadpool mientras espera a la base de datos. `run_sync` corre en
+el hilo del event loop, así que sólo sirve para trabajo corto y sin locks de
+hilos: los registros (escrituras pesadas) siguen en los routers síncronos.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.db_config.database_async import get_db_async, get_db_lectura_async
+from app.models.models import Departamento, IPS
+from app.models.schemas import DepartamentoResponse, CiudadResponse, IPSResponse, IPSCreate
+from app.dashboard.cache_referencias import cache_referencias, respuesta_json
+from app.dashboard.paginacion_ips import (
+    LIMITE_POR_DEFECTO, LIMITE_MAXIMO, campos_solicitados, consultar_pagina, serializar_json
+)
+from app.routes import routers
+
+# Router para Departamentos
+router_departamentos = APIRouter(prefix="/api/departamentos", tags=["departamentos"])
+
+@router_departamentos.get("/", response_model=List[DepartamentoResponse])
+async def get_departamentos(db: AsyncSession = Depends(get_db_lectura_async),
+                            if_none_match: Optional[str] = Header(None)):
+    """Obtener todos los departamentos (JSON cacheado con ETag)"""
+    return respuesta_json(await cache_referencias.departamentos_async(db), if_none_match)
+
+@router_departamentos.get("/{id}", response_model=DepartamentoResponse)
+async def get_departamento_by_id(id: int, db: AsyncSession = Depends(get_db_lectura_async)):
+    """Obtener un departamento por ID"""
+    departamento = await db.get(Departamento, id)
+    if not departamento:
+        raise HTTPException(status_code=404, detail="Departamento no encontrado")
+    return departamento
+
+@router_departamentos.get("/{id}/ciudades", response_model=List[CiudadResponse])
+async def get_ciudades_by_departamento(id: int, db: AsyncSession = Depends(get_db_lectura_async),
+                                       if_none_match: Optional[str] = Header(None)):
+    """Obtener las ciudades de un departamento (JSON cacheado con ETag)"""
+    entrada = await cache_referencias.ciudades_de_departamento_async(db, id)
+    if entrada is None:
+        raise HTTPException(status_code=404, detail="Departamento no encontrado")
+    return respuesta_json(entrada, if_none_match)
+
+
+# Router para Ciudades
+router_ciudades = APIRouter(prefix="/api/ciudades", tags=["ciudades"])
+
+@router_ciudades.get("/", response_model=List[CiudadResponse])
+async def get_ciudades(db: AsyncSession = Depends(get_db_lectura_async),
+                       if_none_match: Optional[str] = Header(None)):
+    """Obtener todas las ciudades (JSON cacheado con ETag)"""
+    return respuesta_json(await cache_referencias.ciudades_async(db), if_none_match)
+
+
+# Router para IPS
+router_ips = APIRouter(prefix="/api/ips", tags=["ips"])
+
+@router_ips.get("/")
+async def get_ips(
+    cursor: Optional[int] = Query(None, description="id de la última IPS de la página anterior"),
+    limite: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    fields: Optional[str] = Query(None, description="Columnas separadas por coma, p. ej. nombre,tipo"),
+    id_ciudad: Optional[int] = None,
+    tipo: Optional[str] = None,
+    db: AsyncSession = Depends(get_db_lectura_async)
+):
+    """
+    Obtener las IPS paginadas por id (`limite` filas, 100 por defecto). Si
+    hay más resultados, la cabecera X-Siguiente-Cursor trae el valor de
+    `cursor` para la página siguiente.
+
+    Devuelve un arreglo JSON de objetos con sólo las columnas pedidas en
+    `fields` (`id` siempre incluido); sin `fields`, las de IPSResponse.
+    """
+    try:
+        campos = campos_solicitados(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filas, siguiente = await db.run_sync(consultar_pagina, campos, cursor, limite, id_ciudad, tipo)
+    cabeceras = {"X-Siguiente-Cursor": str(siguiente)} if siguiente is not None else {}
+    return StreamingResponse(serializar_json(filas, campos),
+                             media_type="application/json", headers=cabeceras)
+
+@router_ips.get("/{id}", response_model=IPSResponse)
+async def get_ips_by_id(id: int, db: AsyncSession = Depends(get_db_lectura_async)):
+    """Obtener una IPS por ID"""
+    ips = await db.get(IPS, id)
+    if not ips:
+        raise HTTPException(status_code=404, detail="IPS no encontrada")
+    return ips
+
+@router_ips.post("/registrar", response_model=dict)
+async def registrar_ips(ips_data: IPSCreate, db: AsyncSession = Depends(get_db_async)):
+    """Registrar una nueva IPS"""
+    try:
+        nueva_ips = IPS(**ips_data.model_dump())
+        db.add(nueva_ips)
+        await db.commit()
+        return {
+            "success": True,
+            "message": f"IPS registrada exitosamente con ID: {nueva_ips.id}",
+            "id": nueva_ips.id
+        }
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al registrar IPS: {str(e)}")
+
+
+# Registro completo y por lote: se quedan en el engine síncrono. Son cientos
+# a miles de filas de ORM y cálculo en CPU; con run_sync correrían en el hilo
+# del event loop y frenarían todas las demás peticiones, mientras que como
+# rutas `def` FastAPI las ejecuta en su threadpool.
+router_registro = routers.router_registro
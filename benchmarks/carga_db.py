@@ -0,0 +1,168 @@
+"""
+Prueba de carga: routers síncronos (threadpool) vs async (AsyncSession)
+======================================================================
+Levanta ambas versiones de la API en el mismo proceso contra una base
+SQLite temporal y lanza peticiones concurrentes con httpx. Para simular la
+latencia de red de MySQL, cada sentencia SQL espera `--latencia-ms` dentro
+del hilo que la ejecuta (el hilo del threadpool en modo síncrono, el hilo
+del driver en modo async), que es donde bloquearía una consulta real.
+
+    python -m benchmarks.carga_db --peticiones 600 --concurrencia 150 --latencia-ms 200
+
+El modo síncrono queda limitado a 40 peticiones en espera a la vez (el
+threadpool de Starlette); el async sólo por el pool de conexiones. La
+diferencia se nota cuando domina la espera a la base de datos: con latencias
+bajas ambos modos quedan limitados por CPU y el async paga algo más de
+overhead por petición.
+
+Requiere aiosqlite (sólo para esta prueba; en producción se usa aiomysql).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.db_config.database import get_db_lectura
+from app.db_config.database_async import crear_engine_async, get_db_lectura_async
+from app.models.models import Base, Departamento, Ciudad, Irradiacion, IPS
+from app.routes import routers, routers_async
+
+
+def _simular_latencia(conexion_sqlite, segundos: float):
+    if segundos > 0:
+        conexion_sqlite.set_trace_callback(lambda _sql: time.sleep(segundos))
+
+
+def crear_base(ruta: str, num_ips: int):
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(Departamento(id=1, nombre="Antioquia"))
+        db.add(Ciudad(id=1, nombre="Medellín", id_departamento=1))
+        db.add(Irradiacion(id_ciudad=1, mes="Enero", irradiacion_kwh_m2_mes=Decimal("150.25")))
+        db.add_all([
+            IPS(nombre=f"IPS {i}", tipo="Hospital", num_consultorios=10,
+                num_equipos=20, id_ciudad=1)
+            for i in range(num_ips)
+        ])
+        db.commit()
+    engine.dispose()
+
+
+def app_sincrona(ruta: str, latencia: float, conexiones: int) -> FastAPI:
+    engine = create_engine(f"sqlite:///{ruta}", poolclass=QueuePool,
+                           pool_size=conexiones, max_overflow=0,
+                           connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", lambda conexion, _: _simular_latencia(conexion, latencia))
+    Sesion = sessionmaker(bind=engine, autoflush=False)
+
+    def _get_db():
+        db = Sesion()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(routers.router_ips)
+    app.dependency_overrides[get_db_lectura] = _get_db
+    app.state.cerrar = engine.dispose
+    return app
+
+
+def app_async(ruta: str, latencia: float, conexiones: int) -> FastAPI:
+    engine = crear_engine_async(f"sqlite+aiosqlite:///{ruta}", poolclass=AsyncAdaptedQueuePool,
+                                pool_size=conexiones, max_overflow=0,
+                                connect_args={"check_same_thread": False})
+    event.listen(
+        engine.sync_engine, "connect",
+        lambda conexion, _: _simular_latencia(conexion.driver_connection._conn, latencia)
+    )
+    Sesion = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
+    async def _get_db():
+        async with Sesion() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(routers_async.router_departamentos)
+    app.include_router(routers_async.router_ciudades)
+    app.include_router(routers_async.router_ips)
+    app.dependency_overrides[get_db_lectura_async] = _get_db
+    app.state.cerrar = engine.dispose
+    return app
+
+
+async def lanzar_carga(app: FastAPI, ruta: str, peticiones: int, concurrencia: int) -> dict:
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias = []
+    errores = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                 base_url="http://carga", timeout=None) as cliente:
+        async def una():
+            nonlocal errores
+            async with semaforo:
+                inicio = time.perf_counter()
+                respuesta = await cliente.get(ruta)
+                latencias.append(time.perf_counter() - inicio)
+                if respuesta.status_code != 200:
+                    errores += 1
+
+        await cliente.get(ruta)  # calentamiento
+        inicio = time.perf_counter()
+        await asyncio.gather(*(una() for _ in range(peticiones)))
+        total = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "peticiones_por_segundo": round(peticiones / total, 1),
+        "p50_ms": round(statistics.median(latencias) * 1000, 1),
+        "p95_ms": round(latencias[int(len(latencias) * 0.95) - 1] * 1000, 1),
+        "errores": errores,
+        "segundos": round(total, 2),
+    }
+
+
+async def main(args):
+    directorio = tempfile.mkdtemp(prefix="carga_db_")
+    ruta = os.path.join(directorio, "carga.db")
+    crear_base(ruta, args.ips)
+    latencia = args.latencia_ms / 1000
+    url = f"/api/ips/?limite={args.limite}"
+
+    resultados = {"parametros": vars(args)}
+    for modo, fabrica in (("sync", app_sincrona), ("async", app_async)):
+        # Mismo número de conexiones en ambos modos: la diferencia es el threadpool
+        app = fabrica(ruta, latencia, args.concurrencia)
+        resultados[modo] = await lanzar_carga(app, url, args.peticiones, args.concurrencia)
+        cerrar = app.state.cerrar()
+        if asyncio.iscoroutine(cerrar):
+            await cerrar
+
+    resultados["mejora_throughput"] = round(
+        resultados["async"]["peticiones_por_segundo"] / resultados["sync"]["peticiones_por_segundo"], 2
+    )
+    print(json.dumps(resultados, indent=2))
+    os.remove(ruta)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--peticiones", type=int, default=600)
+    parser.add_argument("--concurrencia", type=int, default=150)
+    parser.add_argument("--latencia-ms", type=float, default=200.0)
+    parser.add_argument("--limite", type=int, default=20)
+    parser.add_argument("--ips", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,280 @@
+"""
+Suite de benchmarks reproducible
+================================
+Mide la latencia de los motores de predicción y financiero con artefactos
+sintéticos generados localmente (ver `sinteticos.py`), así que corre sin red
+ni base de datos MySQL. El informe JSON se puede guardar por versión y
+comparar con el de la anterior:
+
+    python -m benchmarks.ejecutar --salida informe.json
+    python -m benchmarks.ejecutar --salida nuevo.json --comparar informe.json
+
+Con `--comparar`, cualquier caso cuya mediana empeore más que `--umbral`
+(20 % por defecto) se reporta como regresión y el proceso sale con código 1.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.sinteticos import generar_artefactos
+
+
+def medir(funcion, repeticiones: int, calentamiento: int = 3, elementos: int = 1) -> dict:
+    """Ejecuta `funcion` varias veces y resume los tiempos en milisegundos"""
+    for _ in range(calentamiento):
+        funcion()
+
+    tiempos = []
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        if gc_activo:
+            gc.enable()
+
+    tiempos.sort()
+    mediana = statistics.median(tiempos)
+    return {
+        "repeticiones": repeticiones,
+        "elementos": elementos,
+        "mediana_ms": round(mediana * 1000, 4),
+        "media_ms": round(statistics.fmean(tiempos) * 1000, 4),
+        "min_ms": round(tiempos[0] * 1000, 4),
+        "p95_ms": round(tiempos[max(int(len(tiempos) * 0.95) - 1, 0)] * 1000, 4),
+        "desviacion_ms": round(statistics.pstdev(tiempos) * 1000, 4),
+        "elementos_por_segundo": round(elementos / mediana, 1) if mediana > 0 else None,
+    }
+
+
+def preparar_casos() -> dict:
+    """
+    Casos a medir: nombre -> (función sin argumentos, elementos por llamada).
+    Se importan aquí porque el registro de modelos lee ML_MODELOS_DIR al
+    importarse.
+    """
+    from decimal import Decimal
+
+    import numpy as np
+
+    from ml_app.dashboard.predictor_tarifa import predecir_consumo_interno, calcular_factura_mensual
+    from ml_app.dashboard.proyeccion import proyectar_facturas
+    from ml_app.dashboard.motor_tarifas import Banda, EsquemaTarifa
+    from ml_app.dashboard.simulador_tarifas import simular_tarifas
+    from ml_app.routes.peak_shaving import (
+        PeakShavingInput, predecir_lote_peak_shaving, programar_peak_shaving
+    )
+    from app.dashboard.calculadora_financiera import CalculadoraFinanciera
+
+    casos = {}
+
+    casos["prediccion_punto"] = (
+        lambda: predecir_consumo_interno("2026-03-04T14:30:00", 24.5), 1
+    )
+    for mes, dias in (("2026-02", 28), ("2026-04", 30), ("2026-01", 31)):
+        casos[f"factura_mensual_{dias}_dias"] = (
+            lambda mes=mes: calcular_factura_mensual(mes, 22.0, True), dias * 96
+        )
+
+    temperaturas_anuales = [22.0, 22.5, 21.0, 18.5, 15.0, 12.5, 11.5, 12.5, 15.0, 17.5, 19.5, 21.0]
+    casos["proyeccion_anual"] = (
+        lambda: proyectar_facturas("2026-01", temperaturas_anuales), 365 * 96
+    )
+
+    esquemas = [
+        EsquemaTarifa(f"peak_{i}", [Banda("peak", 0.30 + i / 1000, es_peak=True, dias=range(5),
+                                          hora_inicio=7 + i % 4, hora_fin=21)], 0.15)
+        for i in range(50)
+    ]
+    casos["comparacion_tarifas_50_esquemas"] = (
+        lambda: simular_tarifas("2026-01", [22.0], esquemas), 50
+    )
+
+    entrada = [PeakShavingInput(hour=14, dayofweek=2, solar_generation=25.0)]
+    lote_peak = [
+        PeakShavingInput(hour=h % 24, dayofweek=h % 7, solar_generation=float(h % 100))
+        for h in range(64)
+    ]
+    casos["peak_shaving_1"] = (lambda: predecir_lote_peak_shaving(entrada), 1)
+    casos["peak_shaving_lote_64"] = (lambda: predecir_lote_peak_shaving(lote_peak), 64)
+    generacion_semana = [max(0.0, 60 * float(np.sin(np.pi * (h % 24 - 6) / 12))) for h in range(168)]
+    casos["peak_shaving_programa_168h"] = (
+        lambda: programar_peak_shaving(datetime(2026, 6, 15), generacion_semana), 168
+    )
+
+    casos["financiero_proyecto"] = (
+        lambda: CalculadoraFinanciera.calcular_resultados_completos(
+            15, 30, Decimal("5000"), Decimal("150.25")
+        ), 1
+    )
+    rng = np.random.default_rng(0)
+    n = 10_000
+    consultorios = rng.integers(0, 60, n)
+    equipos = rng.integers(0, 120, n)
+    consumo = np.round(rng.uniform(0, 20_000, n), 2)
+    irradiacion = np.round(rng.uniform(2, 220, n), 2)
+    casos["financiero_lote_10000"] = (
+        lambda: CalculadoraFinanciera.calcular_resultados_lote(consultorios, equipos, consumo, irradiacion), n
+    )
+
+    casos["registro_completo_sqlite"] = (_caso_registro_completo(), 1)
+    return casos
+
+
+def _caso_registro_completo():
+    """POST /api/registro/completo de punta a punta contra SQLite en memoria"""
+    from decimal import Decimal
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.db_config.database import get_db
+    from app.models.models import Base, Departamento, Ciudad, Irradiacion
+    from app.routes.routers import router_registro
+
+    engine = create_engine("sqlite://", poolclass=StaticPool,
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Sesion = sessionmaker(bind=engine, autoflush=False)
+    with Sesion() as db:
+        db.add(Departamento(id=1, nombre="Antioquia"))
+        db.add(Ciudad(id=1, nombre="Medellín", id_departamento=1))
+        db.add(Irradiacion(id_ciudad=1, mes="Enero", irradiacion_kwh_m2_mes=Decimal("150.25")))
+        db.commit()
+
+    def _get_db():
+        db = Sesion()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(router_registro)
+    app.dependency_overrides[get_db] = _get_db
+    cliente = TestClient(app)
+    datos = {
+        "nombre_ips": "Hospital Benchmark", "tipo_ips": "Hospital",
+        "num_consultorios": 15, "num_equipos": 30, "id_ciudad": 1,
+        "mes_consumo": "Enero", "año_consumo": 2024, "consumo_kwh": 5000,
+    }
+
+    def registrar():
+        respuesta = cliente.post("/api/registro/completo", json=datos)
+        if not respuesta.json()["success"]:
+            raise RuntimeError(respuesta.json()["error"])
+
+    return registrar
+
+
+def metadatos() -> dict:
+    import lightgbm
+    import numpy
+    import pandas
+    import sklearn
+    import sqlalchemy
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).parent, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    return {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versiones": {
+            "numpy": numpy.__version__,
+            "pandas": pandas.__version__,
+            "lightgbm": lightgbm.__version__,
+            "scikit-learn": sklearn.__version__,
+            "sqlalchemy": sqlalchemy.__version__,
+        },
+    }
+
+
+def comparar(actual: dict, anterior: dict, umbral: float) -> list:
+    """Imprime la comparación por caso y devuelve los que empeoraron"""
+    regresiones = []
+    print(f"\n{'caso':<32} {'anterior ms':>12} {'actual ms':>12} {'cambio':>9}")
+    for nombre, resultado in actual["resultados"].items():
+        previo = anterior.get("resultados", {}).get(nombre)
+        if previo is None:
+            print(f"{nombre:<32} {'-':>12} {resultado['mediana_ms']:>12.4f} {'nuevo':>9}")
+            continue
+        cambio = resultado["mediana_ms"] / previo["mediana_ms"] - 1
+        marca = "  <- regresión" if cambio > umbral else ""
+        print(f"{nombre:<32} {previo['mediana_ms']:>12.4f} {resultado['mediana_ms']:>12.4f} "
+              f"{cambio:>+8.1%}{marca}")
+        if cambio > umbral:
+            regresiones.append(nombre)
+    return regresiones
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de predicción y motor financiero")
+    parser.add_argument("--salida", default="informe_benchmarks.json")
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--filtro", default=None, help="Sólo los casos cuyo nombre contenga este texto")
+    parser.add_argument("--comparar", default=None, help="Informe JSON anterior")
+    parser.add_argument("--umbral", type=float, default=0.20)
+    parser.add_argument("--artefactos", default=None,
+                        help="Directorio para los artefactos sintéticos (temporal por defecto)")
+    args = parser.parse_args(argv)
+
+    directorio = Path(args.artefactos or tempfile.mkdtemp(prefix="benchmarks_modelos_"))
+    print(f"Generando artefactos sintéticos en {directorio}...")
+    generar_artefactos(directorio)
+    os.environ["ML_MODELOS_DIR"] = str(directorio)
+    os.environ["ML_MODELOS_VERIFICAR_SEG"] = "0"
+
+    casos = preparar_casos()
+    resultados = {}
+    for nombre, (funcion, elementos) in casos.items():
+        if args.filtro and args.filtro not in nombre:
+            continue
+        resultados[nombre] = medir(funcion, args.repeticiones, elementos=elementos)
+        print(f"{nombre:<32} mediana {resultados[nombre]['mediana_ms']:>10.4f} ms")
+
+    from ml_app.dashboard.predictor_tarifa import verificar_paridad_booster
+    informe = {
+        "metadatos": metadatos(),
+        "verificaciones": {"paridad_booster_max_diferencia": verificar_paridad_booster()},
+        "resultados": resultados,
+    }
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2)
+    print(f"Informe escrito en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+        regresiones = comparar(informe, anterior, args.umbral)
+        if regresiones:
+            print(f"\nRegresiones (> {args.umbral:.0%}): {', '.join(regresiones)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Artefactos ML sintéticos para los benchmarks
+============================================
+Genera, con semilla fija y sin red, modelos con la misma forma que los de
+producción: el paquete de predicción de factura (LightGBM sobre las 28
+features de `features_consumo_neto.pkl` + histórico de 30 días) y el modelo
+de peak shaving (RandomForest sobre hour, dayofweek, SolarGeneration).
+
+No importa nada de `ml_app` para que el llamador pueda apuntar
+ML_MODELOS_DIR al directorio generado antes de cargar el registro.
+"""
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ARCHIVO_FEATURES = Path(__file__).parent.parent / "ml_app" / "modelos" / "features_consumo_neto.pkl"
+SEMILLA = 0
+
+
+def asignar_tarifa(ts):
+    """Misma regla que el paquete real (referenciada desde el pickle)"""
+    if ts.dayofweek < 5 and 7 <= ts.hour < 22:
+        return 0.35
+    return 0.15
+
+
+def generar_paquete_consumo(destino: Path, muestras: int = 5000, arboles: int = 200):
+    import lightgbm as lgb
+
+    rng = np.random.default_rng(SEMILLA)
+    features = list(joblib.load(ARCHIVO_FEATURES))
+
+    X = pd.DataFrame(rng.normal(size=(muestras, len(features))), columns=features)
+    X["hour"] = rng.integers(0, 24, muestras)
+    X["dayofweek"] = rng.integers(0, 7, muestras)
+    X["air_temperature"] = rng.uniform(0, 35, muestras)
+    y = 200 + 5 * X["hour"] + 3 * X["air_temperature"] + rng.normal(size=muestras) * 5
+    modelo = lgb.LGBMRegressor(n_estimators=arboles, random_state=SEMILLA, verbose=-1).fit(X, y)
+
+    indice = pd.date_range("2024-01-01", periods=30 * 96, freq="15min")
+    historico = pd.DataFrame({
+        "consumo_neto_kwh": 250 + 50 * np.sin(np.arange(len(indice)) / 10)
+        + rng.normal(size=len(indice)) * 10
+    }, index=indice)
+
+    paquete = {
+        "modelo": modelo,
+        "features": features,
+        "tarifas": {
+            "funcion_tarifa": asignar_tarifa,
+            "precio_peak": 0.35,
+            "precio_off_peak": 0.15,
+            "horario_peak": "Lunes a Viernes, 7:00 - 22:00",
+            "descripcion": "Tarifa sintética para benchmarks",
+        },
+        "df_historico_ultimos_30_dias": historico,
+    }
+    joblib.dump(paquete, destino / "paquete_completo_prediccion_factura.pkl")
+
+
+def generar_peak_shaving(destino: Path, muestras: int = 2000, arboles: int = 50):
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(SEMILLA)
+    X = pd.DataFrame({
+        "hour": rng.integers(0, 24, muestras),
+        "dayofweek": rng.integers(0, 7, muestras),
+        "SolarGeneration": rng.uniform(0, 100, muestras),
+    })
+    y = ((X["SolarGeneration"] < 30) & (X["hour"].between(7, 21))).astype(int)
+    modelo = RandomForestClassifier(n_estimators=arboles, random_state=SEMILLA).fit(X, y)
+    joblib.dump(modelo, destino / "peak_shaving_model.pkl")
+
+
+def generar_artefactos(destino) -> Path:
+    """Escribe ambos artefactos en `destino` y devuelve la ruta"""
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    generar_paquete_consumo(destino)
+    generar_peak_shaving(destino)
+    return destino
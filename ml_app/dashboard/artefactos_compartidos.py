@@ -0,0 +1,92 @@
+"""
+Artefactos compartidos entre workers
+====================================
+Formato alternativo al pickle del paquete de predicción, pensado para
+servidores con varios workers:
+
+- `modelo_consumo.txt`: modelo LightGBM en formato nativo (sin pickle de
+  sklearn ni dependencia de `__main__`).
+- `tabla_consumo_similar.npy`: estadísticas del histórico ya derivadas
+  (24x7, unos pocos KB), abiertas con `mmap_mode='r'`.
+- `metadatos.json`: orden de features, configuración de tarifas y std_1d.
+  Se escribe al final, así que su mtime marca una versión completa.
+
+Este formato por sí solo no reparte memoria entre workers: el Booster de
+LightGBM vive en memoria nativa de cada proceso que lo carga, y la tabla
+mapeada es demasiado chica para importar. Lo que se comparte viene de cargar
+los modelos en el proceso maestro (`gunicorn --preload` con
+ML_PRECARGAR_MODELOS=1) y congelar el GC antes del fork (ver
+`precargar_antes_de_fork` en registro_modelos), de modo que los workers
+heredan esas páginas copy-on-write. La ventaja propia del formato es que se
+carga sin unpickling ni sklearn.
+
+Para exportar desde el paquete pickle:
+
+    python -m ml_app.dashboard.artefactos_compartidos [destino]
+"""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+DIRECTORIO_COMPARTIDO = "compartido"
+ARCHIVO_METADATOS = "metadatos.json"
+ARCHIVO_MODELO = "modelo_consumo.txt"
+ARCHIVO_TABLA = "tabla_consumo_similar.npy"
+
+
+def cargar_compartido(ruta_metadatos) -> dict:
+    """
+    Carga el modelo exportado. La tabla del histórico queda mapeada en
+    memoria (sólo lectura).
+    """
+    import lightgbm as lgb
+
+    directorio = Path(ruta_metadatos).parent
+    with open(ruta_metadatos, encoding="utf-8") as f:
+        metadatos = json.load(f)
+
+    return {
+        "modelo": lgb.Booster(model_file=str(directorio / ARCHIVO_MODELO)),
+        "features": metadatos["features"],
+        "tarifas": metadatos["tarifas"],
+        "tabla_consumo_similar": np.load(directorio / ARCHIVO_TABLA, mmap_mode="r"),
+        "std_1d": metadatos["std_1d"],
+    }
+
+
+def exportar_compartido(modelo_consumo, destino: Path) -> Path:
+    """Escribe un ModeloConsumo ya preparado en el formato compartido"""
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+
+    modelo = modelo_consumo.modelo
+    booster = getattr(modelo, "booster_", modelo)
+    mejor_iteracion = getattr(modelo, "best_iteration_", None) or None
+    booster.save_model(str(destino / ARCHIVO_MODELO), num_iteration=mejor_iteracion)
+
+    np.save(destino / ARCHIVO_TABLA, np.ascontiguousarray(modelo_consumo.tabla_consumo_similar))
+
+    metadatos = {
+        "features": list(modelo_consumo.features),
+        "tarifas": modelo_consumo.tarifas,
+        "std_1d": modelo_consumo.std_1d,
+    }
+    ruta_metadatos = destino / ARCHIVO_METADATOS
+    temporal = ruta_metadatos.with_suffix(".tmp")
+    temporal.write_text(json.dumps(metadatos, indent=2), encoding="utf-8")
+    temporal.replace(ruta_metadatos)
+    return ruta_metadatos
+
+
+if __name__ == "__main__":
+    from ml_app.dashboard.registro_modelos import MODEL_DIR
+    from ml_app.dashboard.predictor_tarifa import (
+        ARCHIVO_PAQUETE, cargar_paquete, preparar_modelo_consumo
+    )
+
+    destino = Path(sys.argv[1]) if len(sys.argv) > 1 else MODEL_DIR / DIRECTORIO_COMPARTIDO
+    paquete = cargar_paquete(MODEL_DIR / ARCHIVO_PAQUETE)
+    ruta = exportar_compartido(preparar_modelo_consumo(paquete), destino)
+    print(f"✓ Artefactos compartidos exportados en {ruta.parent}")
@@ -0,0 +1,181 @@
+"""
+Cache de facturas mensuales
+===========================
+`calcular_factura_mensual` es determinista para un mismo mes, temperatura
+promedio y período de clases, y los dashboards repiten las mismas consultas.
+Este cache guarda los resultados con:
+
+- clave (mes_año, temperatura cuantizada, es_periodo_clases): la temperatura
+  se redondea a múltiplos de FACTURA_CACHE_PASO_TEMP (0.5 °C por defecto; 0
+  desactiva el redondeo) y la factura se calcula con ese valor redondeado,
+  así el resultado es el mismo venga o no del cache;
+- expulsión LRU al pasar de FACTURA_CACHE_MAX entradas (0 desactiva el cache)
+  y vencimiento por FACTURA_CACHE_TTL_SEG;
+- agrupación de peticiones concurrentes idénticas: sólo una calcula y las
+  demás esperan su resultado;
+- invalidación automática cuando cambia `registro.version('consumo')`, es
+  decir, cuando el modelo se recarga.
+
+La tasa de aciertos se exporta en /metrics.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from ml_app.dashboard.registro_modelos import registro
+from ml_app.dashboard.predictor_tarifa import calcular_factura_mensual
+from app.instrumentacion.metricas import metricas
+
+CONSULTAS_CACHE = metricas.contador(
+    "factura_cache_consultas_total",
+    "Consultas al cache de facturas mensuales por resultado (acierto, fallo, agrupada)",
+    etiquetas=("resultado",)
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CacheFacturas:
+    """
+    Resultados de `funcion(mes_año, temperatura, es_periodo_clases)` con LRU,
+    TTL, agrupación de peticiones en curso e invalidación por versión del
+    artefacto.
+    """
+
+    def __init__(self, funcion, max_entradas: int = 256, ttl_segundos: float = 3600,
+                 paso_temperatura: float = 0.5, artefacto: str = "consumo"):
+        self.funcion = funcion
+        self.max_entradas = max_entradas
+        self.ttl = ttl_segundos
+        self.paso_temperatura = paso_temperatura
+        self.artefacto = artefacto
+        # clave -> (vence_en, resultado), del menos al más usado
+        self._entradas = OrderedDict()
+        # (clave, versión) -> Future del cálculo en curso
+        self._en_curso = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.agrupadas = 0
+        self.expulsiones = 0
+        self.invalidaciones = 0
+
+    def cuantizar(self, temperatura: float) -> float:
+        """Redondea la temperatura al paso configurado"""
+        if self.paso_temperatura <= 0:
+            return temperatura
+        return round(round(temperatura / self.paso_temperatura) * self.paso_temperatura, 6)
+
+    def obtener(self, mes_año: str, temperatura_promedio: float,
+                es_periodo_clases: bool = True) -> dict:
+        """Factura del mes, del cache si está vigente o calculada una sola vez"""
+        temperatura = self.cuantizar(temperatura_promedio)
+        if self.max_entradas <= 0:
+            return self.funcion(mes_año, temperatura, es_periodo_clases)
+
+        # obtener() también revisa si el archivo del modelo cambió, aunque
+        # todas las peticiones salgan del cache
+        registro.obtener(self.artefacto)
+        version = registro.version(self.artefacto)
+        clave = (mes_año, temperatura, bool(es_periodo_clases))
+
+        with self._lock:
+            if version != self._version:
+                if self._version is not None and self._entradas:
+                    self.invalidaciones += 1
+                    logger.info("Cache de facturas invalidado: '%s' pasó a v%s", self.artefacto, version)
+                self._entradas.clear()
+                self._version = version
+
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] > time.monotonic():
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                CONSULTAS_CACHE.incrementar(etiquetas=("acierto",))
+                return dict(entrada[1])
+
+            futuro = self._en_curso.get((clave, version))
+            lider = futuro is None
+            if lider:
+                futuro = self._en_curso[(clave, version)] = Future()
+                self.fallos += 1
+            else:
+                self.agrupadas += 1
+
+        if not lider:
+            CONSULTAS_CACHE.incrementar(etiquetas=("agrupada",))
+            return dict(futuro.result())
+
+        CONSULTAS_CACHE.incrementar(etiquetas=("fallo",))
+        try:
+            resultado = self.funcion(mes_año, temperatura, es_periodo_clases)
+        except BaseException as e:
+            with self._lock:
+                self._en_curso.pop((clave, version), None)
+            futuro.set_exception(e)
+            raise
+
+        with self._lock:
+            # Si el modelo cambió durante el cálculo, el resultado no se guarda
+            if version == self._version:
+                self._entradas[clave] = (time.monotonic() + self.ttl, resultado)
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+                    self.expulsiones += 1
+            self._en_curso.pop((clave, version), None)
+        futuro.set_result(resultado)
+        return dict(resultado)
+
+    def invalidar(self):
+        """Descarta todas las entradas"""
+        with self._lock:
+            self._entradas.clear()
+            self.invalidaciones += 1
+
+    def tasa_aciertos(self):
+        """Fracción de consultas que no calcularon (aciertos + agrupadas)"""
+        consultas = self.aciertos + self.fallos + self.agrupadas
+        if not consultas:
+            return None
+        return round((self.aciertos + self.agrupadas) / consultas, 4)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl,
+                "paso_temperatura": self.paso_temperatura,
+                "version_modelo": self._version,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "agrupadas": self.agrupadas,
+                "tasa_aciertos": self.tasa_aciertos(),
+                "expulsiones": self.expulsiones,
+                "invalidaciones": self.invalidaciones,
+                "en_curso": len(self._en_curso),
+            }
+
+
+cache_facturas = CacheFacturas(
+    calcular_factura_mensual,
+    max_entradas=int(os.getenv("FACTURA_CACHE_MAX", "256")),
+    ttl_segundos=float(os.getenv("FACTURA_CACHE_TTL_SEG", "3600")),
+    paso_temperatura=float(os.getenv("FACTURA_CACHE_PASO_TEMP", "0.5")),
+)
+
+metricas.medidor(
+    "factura_cache_tasa_aciertos",
+    "Fracción de consultas de factura mensual resueltas sin calcular",
+    cache_facturas.tasa_aciertos
+)
+metricas.medidor(
+    "factura_cache_entradas",
+    "Entradas en el cache de facturas mensuales",
+    lambda: len(cache_facturas._entradas)
+)
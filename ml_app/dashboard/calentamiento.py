@@ -0,0 +1,80 @@
+"""
+Calentamiento de modelos al arrancar
+====================================
+Cada módulo que usa un modelo registra aquí una función que hace una
+predicción de prueba. Al arrancar, la app las ejecuta en un hilo aparte:
+así se cargan los artefactos y se inicializan los pools de hilos (OpenMP de
+LightGBM, joblib de sklearn) antes de la primera petición real, sin retrasar
+el arranque del servidor.
+
+`GET /ready` (ver ml_app/routes/preparacion.py) responde 503 hasta que todas
+las tareas terminan bien; un error queda reportado ahí en vez de tumbar el
+worker. ML_CALENTAR=0 desactiva el calentamiento.
+"""
+import os
+import threading
+import time
+
+CALENTAR_AL_ARRANCAR = os.getenv("ML_CALENTAR", "1") != "0"
+
+
+class Calentador:
+    """Tareas de calentamiento por nombre y su resultado"""
+
+    def __init__(self, activo: bool = CALENTAR_AL_ARRANCAR):
+        self.activo = activo
+        self._tareas = {}
+        self._estado = {}
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def registrar(self, nombre: str, funcion):
+        with self._lock:
+            self._tareas[nombre] = funcion
+            self._estado.setdefault(nombre, {"estado": "pendiente"})
+
+    def ejecutar(self):
+        """Ejecuta todas las tareas en orden; un error no detiene las demás"""
+        for nombre, funcion in list(self._tareas.items()):
+            with self._lock:
+                self._estado[nombre] = {"estado": "en_curso"}
+            inicio = time.perf_counter()
+            try:
+                funcion()
+            except Exception as e:
+                resultado = {"estado": "error", "error": f"{type(e).__name__}: {e}"}
+                print(f"Advertencia: falló el calentamiento de '{nombre}': {e}")
+            else:
+                resultado = {"estado": "listo"}
+            resultado["segundos"] = round(time.perf_counter() - inicio, 4)
+            with self._lock:
+                self._estado[nombre] = resultado
+        print(f"Calentamiento terminado: {self.estado()['tareas']}")
+
+    def iniciar_en_segundo_plano(self):
+        """Lanza `ejecutar` en un hilo (una sola vez por proceso)"""
+        if not self.activo:
+            return None
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self.ejecutar, name="calentamiento", daemon=True)
+                self._hilo.start()
+        return self._hilo
+
+    @property
+    def listo(self) -> bool:
+        if not self.activo:
+            return True
+        with self._lock:
+            return all(e["estado"] == "listo" for e in self._estado.values())
+
+    def estado(self) -> dict:
+        with self._lock:
+            tareas = {nombre: dict(e) for nombre, e in self._estado.items()}
+        return {
+            "calentamiento": "activo" if self.activo else "desactivado",
+            "tareas": tareas,
+        }
+
+
+calentador = Calentador()
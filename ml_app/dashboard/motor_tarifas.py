@@ -0,0 +1,174 @@
+"""
+Motor de tarifas - bandas compiladas a una tabla de búsqueda
+============================================================
+Una tarifa (`EsquemaTarifa`) es una lista de bandas: precio, si cuenta como
+horario pico, días de la semana, rango de horas y meses en que aplica. Las
+bandas se compilan una sola vez a tablas de forma (12 meses, 8 días, 96
+franjas de 15 min); el día 7 es la fila de los feriados. La primera banda que
+cubre una franja gana y lo que ninguna cubre va a la banda base.
+
+Cada intervalo se traduce a una posición plana de esa tabla con
+`indice_calendario` (o `indice_plano` si ya se tienen mes, día y franja), y
+el precio de cualquier cantidad de intervalos sale de un solo gather:
+
+    indice = indice_calendario(timestamps, feriados)
+    precio, es_peak = TARIFA_POR_DEFECTO.aplicar(indice)
+
+El índice no depende de la tarifa, así que se calcula una vez y sirve para
+comparar varios esquemas sobre el mismo período.
+"""
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+PRECIO_PEAK = 0.35  # AUD/kWh peak
+PRECIO_OFF_PEAK = 0.15  # AUD/kWh off-peak
+
+FRANJAS_POR_DIA = 96
+DIA_FERIADO = 7
+FORMA_TABLA = (12, 8, FRANJAS_POR_DIA)
+
+
+class Banda:
+    """
+    Banda tarifaria. `hora_inicio` y `hora_fin` van en horas (admiten
+    fracciones de 15 min, p. ej. 7.5); si hora_fin <= hora_inicio la banda
+    cruza la medianoche. `dias` usa 0=lunes ... 6=domingo y 7=feriado.
+    """
+
+    __slots__ = ("nombre", "precio", "es_peak", "dias", "hora_inicio", "hora_fin", "meses")
+
+    def __init__(self, nombre: str, precio: float, es_peak: bool = False,
+                 dias: Iterable[int] = range(7), hora_inicio: float = 0,
+                 hora_fin: float = 24, meses: Iterable[int] = range(1, 13)):
+        self.nombre = nombre
+        self.precio = float(precio)
+        self.es_peak = bool(es_peak)
+        self.dias = sorted(set(dias))
+        self.hora_inicio = hora_inicio
+        self.hora_fin = hora_fin
+        self.meses = sorted(set(meses))
+
+        if not self.dias or not self.meses:
+            raise ValueError(f"Banda '{nombre}': debe aplicar al menos a un día y un mes")
+        if any(d < 0 or d > DIA_FERIADO for d in self.dias):
+            raise ValueError(f"Banda '{nombre}': los días van de 0 (lunes) a 7 (feriado)")
+        if any(m < 1 or m > 12 for m in self.meses):
+            raise ValueError(f"Banda '{nombre}': los meses van de 1 a 12")
+        for hora in (hora_inicio, hora_fin):
+            if not 0 <= hora <= 24 or (hora * 4) != int(hora * 4):
+                raise ValueError(
+                    f"Banda '{nombre}': las horas van de 0 a 24 en múltiplos de 15 min"
+                )
+
+    def franjas(self) -> np.ndarray:
+        inicio = int(self.hora_inicio * 4)
+        fin = int(self.hora_fin * 4)
+        if fin > inicio:
+            return np.arange(inicio, fin)
+        # Cruza la medianoche (p. ej. 22 -> 6)
+        return np.concatenate([np.arange(inicio, FRANJAS_POR_DIA), np.arange(0, fin)])
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "Banda":
+        return cls(**datos)
+
+
+class EsquemaTarifa:
+    """Bandas compiladas a tablas de precio y horario pico sobre (mes, día, franja)"""
+
+    __slots__ = ("nombre", "bandas", "tabla_banda", "tabla_precio", "tabla_peak",
+                 "_precio_plano", "_peak_plano", "_banda_plana")
+
+    def __init__(self, nombre: str, bandas: list, precio_base: float,
+                 nombre_base: str = "off_peak"):
+        if not bandas:
+            raise ValueError(f"El esquema '{nombre}' no tiene bandas")
+        if len(bandas) > 126:
+            raise ValueError(f"El esquema '{nombre}' tiene demasiadas bandas")
+        self.nombre = nombre
+        self.bandas = [Banda(nombre_base, precio_base)] + list(bandas)
+
+        tabla = np.zeros(FORMA_TABLA, dtype=np.int8)
+        # Se pintan de la última a la primera para que gane la primera que coincide
+        for i in range(len(self.bandas) - 1, 0, -1):
+            banda = self.bandas[i]
+            meses = np.asarray(banda.meses, dtype=np.intp) - 1
+            dias = np.asarray(banda.dias, dtype=np.intp)
+            tabla[np.ix_(meses, dias, banda.franjas())] = i
+
+        precios = np.array([b.precio for b in self.bandas], dtype=np.float64)
+        peak = np.array([b.es_peak for b in self.bandas], dtype=bool)
+        self.tabla_banda = tabla
+        self.tabla_precio = precios[tabla]
+        self.tabla_peak = peak[tabla]
+        for arreglo in (self.tabla_banda, self.tabla_precio, self.tabla_peak):
+            arreglo.setflags(write=False)
+        self._banda_plana = self.tabla_banda.ravel()
+        self._precio_plano = self.tabla_precio.ravel()
+        self._peak_plano = self.tabla_peak.ravel()
+
+    def aplicar(self, indice: np.ndarray):
+        """(precio, es_peak) de cada intervalo a partir de su índice plano"""
+        return self._precio_plano[indice], self._peak_plano[indice]
+
+    def bandas_de(self, indice: np.ndarray) -> np.ndarray:
+        """Posición en `self.bandas` de la banda que aplica a cada intervalo"""
+        return self._banda_plana[indice]
+
+    def precio_en(self, timestamp: pd.Timestamp, es_feriado: bool = False):
+        """(precio, es_peak) de un solo momento, sin crear arreglos"""
+        dia = DIA_FERIADO if es_feriado else timestamp.dayofweek
+        franja = timestamp.hour * 4 + timestamp.minute // 15
+        i = timestamp.month - 1, dia, franja
+        return float(self.tabla_precio[i]), bool(self.tabla_peak[i])
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "EsquemaTarifa":
+        """Construye el esquema desde {'nombre', 'precio_base', 'bandas': [...]}"""
+        return cls(
+            datos["nombre"],
+            [Banda.desde_dict(b) for b in datos["bandas"]],
+            datos["precio_base"],
+            datos.get("nombre_base", "off_peak"),
+        )
+
+
+def indice_plano(mes: np.ndarray, dia_semana: np.ndarray, franja: np.ndarray,
+                 es_feriado=None) -> np.ndarray:
+    """Posición en las tablas aplanadas; `mes` va de 1 a 12"""
+    dia = np.asarray(dia_semana, dtype=np.intp)
+    if es_feriado is not None:
+        dia = np.where(es_feriado, DIA_FERIADO, dia)
+    return ((np.asarray(mes, dtype=np.intp) - 1) * 8 + dia) * FRANJAS_POR_DIA + franja
+
+
+def indice_calendario(timestamps: pd.DatetimeIndex, feriados=None) -> np.ndarray:
+    """
+    Índice plano de cada timestamp. `feriados` es una lista de fechas cuyos
+    intervalos se tarifican con la fila de feriados.
+    """
+    franja = (np.asarray(timestamps.hour, dtype=np.intp) * 4
+              + np.asarray(timestamps.minute, dtype=np.intp) // 15)
+    es_feriado = None
+    if feriados is not None and len(feriados):
+        dias = np.asarray(timestamps.normalize().values, dtype="datetime64[D]")
+        es_feriado = np.isin(dias, np.asarray(feriados, dtype="datetime64[D]"))
+    return indice_plano(timestamps.month, timestamps.dayofweek, franja, es_feriado)
+
+
+# Tarifa vigente: peak de lunes a viernes de 7:00 a 22:00, el resto off-peak
+TARIFA_POR_DEFECTO = EsquemaTarifa(
+    "peak_off_peak",
+    [Banda("peak", PRECIO_PEAK, es_peak=True, dias=range(5), hora_inicio=7, hora_fin=22)],
+    precio_base=PRECIO_OFF_PEAK,
+)
+
+
+def asignar_tarifa_legado(ts):
+    """
+    Reemplazo de la función `asignar_tarifa` que el paquete pickle guardó
+    como `__main__.asignar_tarifa`; sólo se usa para deserializarlo.
+    """
+    return TARIFA_POR_DEFECTO.precio_en(pd.Timestamp(ts))[0]
@@ -3,45 +3,164 @@ Módulo de predicción - Lógica del modelo ML
 """
 import pandas as pd
 import numpy as np
-import joblib
+import os
+import sys
+import threading
+import time
 from pathlib import Path
 
-# Cargar modelo al inicio
-MODEL_DIR = Path(__file__).parent.parent / "modelos"
+import joblib
 
-import sys
+from ml_app.dashboard.registro_modelos import registro
+from ml_app.dashboard.calentamiento import calentador
+from ml_app.dashboard.motor_tarifas import (
+    TARIFA_POR_DEFECTO, EsquemaTarifa, asignar_tarifa_legado, indice_calendario
+)
+from ml_app.dashboard.artefactos_compartidos import (
+    DIRECTORIO_COMPARTIDO, ARCHIVO_METADATOS, cargar_compartido
+)
+from app.instrumentacion.metricas import observar_tramo, cronometrado
+
+ARCHIVO_PAQUETE = 'paquete_completo_prediccion_factura.pkl'
+
+# Hilos de LightGBM para lotes grandes (0 = los que decida LightGBM); los
+# lotes pequeños usan un solo hilo para no pagar el arranque de OpenMP
+HILOS_PREDICCION = int(os.getenv("ML_PREDICCION_HILOS", "0"))
+LOTE_MIN_MULTIHILO = int(os.getenv("ML_PREDICCION_LOTE_MIN_MULTIHILO", "512"))
+
+
+_lock_paquete = threading.Lock()
+_SIN_VALOR = object()
+
+
+def cargar_paquete(ruta):
+    """
+    Deserializa el paquete completo de predicción de factura.
+
+    El paquete se serializó desde un script, así que guarda su función de
+    tarifa como `__main__.asignar_tarifa`. Sólo mientras dura el joblib.load
+    ese nombre apunta a la versión del motor de tarifas, y después __main__
+    queda como estaba. Exportar una vez al formato compartido (ver
+    artefactos_compartidos) evita este paso: ahí no se deserializa ninguna
+    función.
+    """
+    principal = sys.modules["__main__"]
+    with _lock_paquete:
+        previo = getattr(principal, "asignar_tarifa", _SIN_VALOR)
+        principal.asignar_tarifa = asignar_tarifa_legado
+        try:
+            return joblib.load(ruta)
+        finally:
+            if previo is _SIN_VALOR:
+                del principal.asignar_tarifa
+            else:
+                principal.asignar_tarifa = previo
+
+
+def construir_estadisticas_historicas(df_historico: pd.DataFrame):
+    """
+    Precalcula las estadísticas del histórico que no dependen de la petición.
+
+    Devuelve una tabla 24x7 con el consumo medio por (hora, día de semana)
+    —usando la media global donde no hay muestras— y la volatilidad diaria
+    global (std móvil de 96 intervalos).
+    """
+    consumo_historico = df_historico['consumo_neto_kwh']
+    medias = consumo_historico.groupby(
+        [df_historico.index.hour, df_historico.index.dayofweek]
+    ).mean()
+
+    tabla = np.full((24, 7), consumo_historico.mean())
+    tabla[
+        medias.index.get_level_values(0), medias.index.get_level_values(1)
+    ] = medias.to_numpy()
+    tabla.setflags(write=False)
+
+    std_1d = float(consumo_historico.rolling(96).std().mean())
+    return tabla, std_1d
+
+
+class ModeloConsumo:
+    """
+    Lo que la ruta caliente necesita del paquete: el modelo, el orden de las
+    features, la configuración de tarifas y las estadísticas del histórico.
+    El DataFrame histórico se descarta después de derivar la tabla.
+
+    Si el modelo es LightGBM se guarda también su Booster nativo, que recibe
+    directamente una matriz NumPy en el orden de `features` sin pasar por
+    pandas ni por la validación de nombres de sklearn.
+    """
+
+    __slots__ = ("modelo", "features", "tarifas",
+                 "tabla_consumo_similar", "std_1d", "booster")
 
-# Definir la función que falta en __main__
-def asignar_tarifa(ts):
-    hora = ts.hour
-    dia_semana = ts.dayofweek
-    if dia_semana < 5 and 7 <= hora < 22:  # Laborables peak
-        return 0.35  # AUD/kWh peak
-    else:
-        return 0.15  # AUD/kWh off-peak
+    def __init__(self, modelo, features, tarifas, tabla_consumo_similar, std_1d):
+        self.modelo = modelo
+        self.features = list(features)
+        self.tarifas = tarifas
+        self.tabla_consumo_similar = tabla_consumo_similar
+        self.std_1d = std_1d
+        self.booster = getattr(modelo, 'booster_', None)
+        if self.booster is None and type(modelo).__name__ == 'Booster':
+            self.booster = modelo
 
-# Inyectar la función en __main__ para que pickle la encuentre
-import __main__
-setattr(__main__, "asignar_tarifa", asignar_tarifa)
+    def predecir(self, X: np.ndarray, hilos: int = None) -> np.ndarray:
+        """Predice sobre una matriz (n, len(features)) en el orden de features"""
+        inicio = time.perf_counter()
+        if self.booster is None:
+            prediccion = np.asarray(self.modelo.predict(pd.DataFrame(X, columns=self.features)))
+        else:
+            if hilos is None:
+                hilos = 1 if len(X) < LOTE_MIN_MULTIHILO else HILOS_PREDICCION
+            prediccion = self.booster.predict(X, num_threads=hilos)
+        observar_tramo("ml_modelo_predict", inicio)
+        return prediccion
 
-print("Cargando modelo ML...")
-try:
-    paquete = joblib.load(MODEL_DIR / 'paquete_completo_prediccion_factura.pkl')
-except AttributeError as e:
-    # Fallback si __main__ no funciona como esperamos (ej. en algunos entornos de test)
-    # Intentamos inyectarlo en el módulo actual y decirle a sys.modules que __main__ es este módulo
-    print(f"Advertencia: {e}. Intentando estrategia alternativa de carga...")
-    # Esta parte es solo por si acaso, el setattr arriba debería ser suficiente
-    raise e
 
-paquete = joblib.load(MODEL_DIR / 'paquete_completo_prediccion_factura.pkl')
+def preparar_modelo_consumo(paquete: dict) -> ModeloConsumo:
+    """Convierte el paquete deserializado en un ModeloConsumo"""
+    tabla, std_1d = construir_estadisticas_historicas(
+        paquete['df_historico_ultimos_30_dias']
+    )
+    tarifas = {k: v for k, v in paquete['tarifas'].items() if k != 'funcion_tarifa'}
+    return ModeloConsumo(paquete['modelo'], paquete['features'], tarifas, tabla, std_1d)
 
-modelo = paquete['modelo']
-features = paquete['features']
-asignar_tarifa = paquete['tarifas']['funcion_tarifa']
-df_historico = paquete['df_historico_ultimos_30_dias']
 
-print("✓ Modelo ML cargado exitosamente\n")
+def cargar_modelo_compartido(ruta) -> ModeloConsumo:
+    """Carga el formato compartido (LightGBM nativo + tabla mapeada en memoria)"""
+    return ModeloConsumo(**cargar_compartido(ruta))
+
+
+# Si existe la exportación compartida se prefiere al pickle del paquete
+_RUTA_COMPARTIDA = Path(DIRECTORIO_COMPARTIDO) / ARCHIVO_METADATOS
+
+if (registro.directorio / _RUTA_COMPARTIDA).exists():
+    registro.registrar('consumo', str(_RUTA_COMPARTIDA), cargar=cargar_modelo_compartido)
+else:
+    registro.registrar(
+        'consumo',
+        ARCHIVO_PAQUETE,
+        preparar=preparar_modelo_consumo,
+        cargar=cargar_paquete
+    )
+
+
+def obtener_modelo_consumo() -> ModeloConsumo:
+    """Modelo de consumo compartido (se carga en la primera llamada)"""
+    return registro.obtener('consumo')
+
+
+def calentar_modelo_consumo():
+    """
+    Carga el modelo y hace una predicción puntual y un lote de una semana
+    (mayor que LOTE_MIN_MULTIHILO, para arrancar también los hilos de LightGBM)
+    """
+    predecir_consumo_interno('2026-01-05T12:00:00', 20.0)
+    timestamps = pd.date_range('2026-01-05', periods=7 * 96, freq='15min')
+    predecir_consumo_lote(timestamps, 20.0)
+
+
+calentador.registrar('consumo', calentar_modelo_consumo)
 
 
 def predecir_consumo_interno(timestamp_str: str, temperatura: float, 
@@ -51,6 +170,8 @@ def predecir_consumo_interno(timestamp_str: str, temperatura: float,
     """
     Función de predicción usando el modelo ML
     """
+    m = obtener_modelo_consumo()
+    inicio_features = time.perf_counter()
     timestamp = pd.Timestamp(timestamp_str)
     
     # Extraer info del timestamp
@@ -68,14 +189,8 @@ def predecir_consumo_interno(timestamp_str: str, temperatura: float,
     # Features de clima
     temp_squared = temperatura ** 2
     
-    # Obtener lags del histórico
-    consumo_historico = df_historico['consumo_neto_kwh']
-    mask_similar = (df_historico.index.hour == hora) & (df_historico.index.dayofweek == dia_semana)
-    
-    if mask_similar.sum() > 0:
-        consumo_similar = consumo_historico[mask_similar].mean()
-    else:
-        consumo_similar = consumo_historico.mean()
+    # Obtener lags del histórico (precalculados al cargar el modelo)
+    consumo_similar = m.tabla_consumo_similar[hora, dia_semana]
     
     lag_1d = consumo_similar
     lag_2d = consumo_similar * 0.98
@@ -84,7 +199,7 @@ def predecir_consumo_interno(timestamp_str: str, temperatura: float,
     rolling_max_24h = consumo_similar * 1.2
     
     # Features de volatilidad
-    std_1d = consumo_historico.rolling(96).std().mean()
+    std_1d = m.std_1d
     std_2h = std_1d * 0.5
     max_1d = consumo_similar * 1.2
     min_1d = consumo_similar * 0.7
@@ -99,41 +214,43 @@ def predecir_consumo_interno(timestamp_str: str, temperatura: float,
     temp_x_peak = temperatura * es_hora_pico
     workday_semester = 1 if (dia_semana < 5 and es_periodo_clases) else 0
     
-    # Crear DataFrame con todas las features
-    datos = pd.DataFrame({
-        'hour': [hora],
-        'dayofweek': [dia_semana],
-        'month': [mes],
-        'is_weekend': [es_fin_semana],
-        'hour_sin': [hour_sin],
-        'hour_cos': [hour_cos],
-        'dayofweek_sin': [dayofweek_sin],
-        'dayofweek_cos': [dayofweek_cos],
-        'is_holiday': [1 if es_feriado else 0],
-        'is_semester': [1 if es_periodo_clases else 0],
-        'is_exam': [1 if es_examen else 0],
-        'air_temperature': [temperatura],
-        'temp_squared': [temp_squared],
-        'lag_1d': [lag_1d],
-        'lag_2d': [lag_2d],
-        'lag_1w': [lag_1w],
-        'rolling_mean_24h': [rolling_mean_24h],
-        'rolling_max_24h': [rolling_max_24h],
-        'std_1d': [std_1d],
-        'std_2h': [std_2h],
-        'max_1d': [max_1d],
-        'min_1d': [min_1d],
-        'range_1d': [range_1d],
-        'diff_1': [diff_1],
-        'diff_4': [diff_4],
-        'is_peak_hour': [es_hora_pico],
-        'temp_x_peak': [temp_x_peak],
-        'workday_semester': [workday_semester]
-    })
+    # Todas las features, en una fila ordenada como las espera el modelo
+    datos = {
+        'hour': hora,
+        'dayofweek': dia_semana,
+        'month': mes,
+        'is_weekend': es_fin_semana,
+        'hour_sin': hour_sin,
+        'hour_cos': hour_cos,
+        'dayofweek_sin': dayofweek_sin,
+        'dayofweek_cos': dayofweek_cos,
+        'is_holiday': 1 if es_feriado else 0,
+        'is_semester': 1 if es_periodo_clases else 0,
+        'is_exam': 1 if es_examen else 0,
+        'air_temperature': temperatura,
+        'temp_squared': temp_squared,
+        'lag_1d': lag_1d,
+        'lag_2d': lag_2d,
+        'lag_1w': lag_1w,
+        'rolling_mean_24h': rolling_mean_24h,
+        'rolling_max_24h': rolling_max_24h,
+        'std_1d': std_1d,
+        'std_2h': std_2h,
+        'max_1d': max_1d,
+        'min_1d': min_1d,
+        'range_1d': range_1d,
+        'diff_1': diff_1,
+        'diff_4': diff_4,
+        'is_peak_hour': es_hora_pico,
+        'temp_x_peak': temp_x_peak,
+        'workday_semester': workday_semester
+    }
+    X = np.array([[datos[f] for f in m.features]], dtype=np.float64)
+    observar_tramo("ml_features_punto", inicio_features)
     
     # Hacer predicción
-    consumo = modelo.predict(datos[features])[0]
-    precio = asignar_tarifa(timestamp)
+    consumo = m.predecir(X)[0]
+    precio, es_peak = TARIFA_POR_DEFECTO.precio_en(timestamp)
     costo = consumo * precio
     
     return {
@@ -143,5 +260,305 @@ def predecir_consumo_interno(timestamp_str: str, temperatura: float,
         'precio_aud_kwh': precio,
         'costo_aud_15min': round(costo, 4),
         'costo_aud_hora': round(costo * 4, 2),
-        'es_horario_peak': precio == 0.35
-    }
\ No newline at end of file
+        'es_horario_peak': es_peak
+    }
+
+
+# =========================
+# Predicción por lotes (vectorizada)
+# =========================
+
+def columnas_calendario(timestamps: pd.DatetimeIndex) -> dict:
+    """
+    Features que sólo dependen de la fecha y hora de cada intervalo (hora,
+    día, mes, fin de semana, componentes cíclicas y horario pico). Se pueden
+    calcular una vez y reutilizar con distintas temperaturas.
+    """
+    hora = np.asarray(timestamps.hour, dtype=np.int64)
+    dia_semana = np.asarray(timestamps.dayofweek, dtype=np.int64)
+    return {
+        'hour': hora,
+        'dayofweek': dia_semana,
+        'month': np.asarray(timestamps.month, dtype=np.int64),
+        'is_weekend': (dia_semana >= 5).astype(np.int64),
+        'hour_sin': np.sin(2 * np.pi * hora / 24),
+        'hour_cos': np.cos(2 * np.pi * hora / 24),
+        'dayofweek_sin': np.sin(2 * np.pi * dia_semana / 7),
+        'dayofweek_cos': np.cos(2 * np.pi * dia_semana / 7),
+        'is_peak_hour': ((dia_semana < 5) & (hora >= 7) & (hora < 22)).astype(np.int64),
+    }
+
+
+def _columnas_features(m: ModeloConsumo,
+                       timestamps: pd.DatetimeIndex,
+                       temperaturas: np.ndarray,
+                       es_periodo_clases,
+                       es_feriado=False,
+                       es_examen=False,
+                       calendario: dict = None) -> dict:
+    """
+    Calcula cada feature como un arreglo sobre todo el rango.
+
+    Replica exactamente las features de predecir_consumo_interno, pero con
+    operaciones NumPy. Los indicadores (clases, feriado, examen) pueden ser un
+    escalar o un arreglo del mismo largo que timestamps. Si se pasa
+    `calendario` (ver columnas_calendario) no se usa `timestamps`.
+    """
+    if calendario is None:
+        calendario = columnas_calendario(timestamps)
+    hora = calendario['hour']
+    dia_semana = calendario['dayofweek']
+    n = len(hora)
+    temperaturas = np.broadcast_to(np.asarray(temperaturas, dtype=np.float64), (n,))
+
+    es_clases = np.broadcast_to(np.asarray(es_periodo_clases, dtype=bool), (n,))
+    feriado = np.broadcast_to(np.asarray(es_feriado, dtype=bool), (n,))
+    examen = np.broadcast_to(np.asarray(es_examen, dtype=bool), (n,))
+
+    # Lags del histórico: una lectura de la tabla 24x7 por intervalo
+    consumo_similar = m.tabla_consumo_similar[hora, dia_semana]
+    std_1d = m.std_1d
+    max_1d = consumo_similar * 1.2
+    min_1d = consumo_similar * 0.7
+
+    es_hora_pico = calendario['is_peak_hour']
+    ceros = np.zeros(n, dtype=np.int64)
+
+    columnas = {
+        **calendario,
+        'is_holiday': feriado.astype(np.int64),
+        'is_semester': es_clases.astype(np.int64),
+        'is_exam': examen.astype(np.int64),
+        'air_temperature': temperaturas,
+        'temp_squared': temperaturas ** 2,
+        'lag_1d': consumo_similar,
+        'lag_2d': consumo_similar * 0.98,
+        'lag_1w': consumo_similar * 1.02,
+        'rolling_mean_24h': consumo_similar,
+        'rolling_max_24h': consumo_similar * 1.2,
+        'std_1d': np.full(n, std_1d),
+        'std_2h': np.full(n, std_1d * 0.5),
+        'max_1d': max_1d,
+        'min_1d': min_1d,
+        'range_1d': max_1d - min_1d,
+        'diff_1': ceros,
+        'diff_4': ceros,
+        'temp_x_peak': temperaturas * es_hora_pico,
+        'workday_semester': ((dia_semana < 5) & es_clases).astype(np.int64),
+    }
+    return columnas
+
+
+def construir_features_lote(timestamps: pd.DatetimeIndex,
+                            temperaturas: np.ndarray,
+                            es_periodo_clases,
+                            es_feriado=False,
+                            es_examen=False,
+                            m: ModeloConsumo = None) -> pd.DataFrame:
+    """
+    Construye las features de muchos intervalos como DataFrame, listo para
+    modelo.predict (ruta pandas de referencia)
+    """
+    m = m or obtener_modelo_consumo()
+    columnas = _columnas_features(
+        m, timestamps, temperaturas, es_periodo_clases, es_feriado, es_examen
+    )
+    return pd.DataFrame(columnas)[m.features]
+
+
+@cronometrado("ml_features_lote")
+def construir_matriz_features(timestamps: pd.DatetimeIndex,
+                              temperaturas: np.ndarray,
+                              es_periodo_clases,
+                              es_feriado=False,
+                              es_examen=False,
+                              m: ModeloConsumo = None,
+                              calendario: dict = None) -> np.ndarray:
+    """
+    Construye las features de muchos intervalos como matriz float64 contigua
+    (n, len(features)) en el orden del modelo, para el Booster nativo
+    """
+    m = m or obtener_modelo_consumo()
+    columnas = _columnas_features(
+        m, timestamps, temperaturas, es_periodo_clases, es_feriado, es_examen,
+        calendario=calendario
+    )
+    X = np.empty((len(columnas['hour']), len(m.features)), dtype=np.float64)
+    for j, nombre in enumerate(m.features):
+        X[:, j] = columnas[nombre]
+    return X
+
+
+def predecir_consumo_lote(timestamps: pd.DatetimeIndex,
+                          temperaturas: np.ndarray,
+                          es_periodo_clases=True,
+                          es_feriado=False,
+                          es_examen=False,
+                          tarifa: EsquemaTarifa = TARIFA_POR_DEFECTO) -> dict:
+    """
+    Predice consumo, precio y costo para todos los intervalos con una sola
+    llamada a modelo.predict; el precio sale de la tabla de `tarifa`.
+
+    Los valores se redondean igual que en predecir_consumo_interno para que
+    las sumas coincidan con las del cálculo intervalo a intervalo.
+    """
+    m = obtener_modelo_consumo()
+    X = construir_matriz_features(
+        timestamps, temperaturas, es_periodo_clases, es_feriado, es_examen, m=m
+    )
+    consumo = np.asarray(m.predecir(X), dtype=np.float64)
+    precio, es_peak = tarifa.aplicar(indice_calendario(timestamps))
+    costo = consumo * precio
+
+    return {
+        'consumo_kwh': np.round(consumo, 2),
+        'precio_aud_kwh': precio,
+        'costo_aud_15min': np.round(costo, 4),
+        'costo_aud_hora': np.round(costo * 4, 2),
+        'es_horario_peak': es_peak
+    }
+
+
+def verificar_paridad_booster(dias: int = 7, tolerancia: float = 1e-9) -> float:
+    """
+    Compara la ruta nativa (matriz NumPy -> Booster) con la ruta pandas
+    (DataFrame -> modelo.predict) sobre `dias` días sintéticos y devuelve la
+    máxima diferencia absoluta. Lanza RuntimeError si supera la tolerancia.
+    """
+    m = obtener_modelo_consumo()
+    timestamps = pd.date_range('2026-03-02', periods=dias * 96, freq='15min')
+    rng = np.random.default_rng(0)
+    temperaturas = rng.uniform(-10, 50, len(timestamps))
+    es_clases = rng.random(len(timestamps)) < 0.7
+    es_feriado = rng.random(len(timestamps)) < 0.1
+
+    X = construir_matriz_features(timestamps, temperaturas, es_clases, es_feriado, m=m)
+    datos = construir_features_lote(timestamps, temperaturas, es_clases, es_feriado, m=m)
+
+    nativo = m.predecir(X)
+    referencia = np.asarray(m.modelo.predict(datos), dtype=np.float64)
+    diferencia = float(np.max(np.abs(nativo - referencia)))
+    if diferencia > tolerancia:
+        raise RuntimeError(f"La ruta nativa difiere de la ruta pandas en {diferencia}")
+    return diferencia
+
+
+def predecir_puntos_lote(timestamps_str: list, temperaturas: list,
+                         es_periodo_clases=True,
+                         es_feriado=False,
+                         es_examen=False) -> dict:
+    """
+    Predice una lista arbitraria de momentos en una sola llamada al modelo.
+
+    Equivale a llamar predecir_consumo_interno para cada punto; la validación
+    de rangos se hace sobre el arreglo completo.
+    """
+    temperaturas = np.asarray(temperaturas, dtype=np.float64)
+    fuera_de_rango = np.flatnonzero((temperaturas < -10) | (temperaturas > 50))
+    if fuera_de_rango.size:
+        i = int(fuera_de_rango[0])
+        raise ValueError(
+            f"temperaturas[{i}]={temperaturas[i]} fuera del rango [-10, 50] "
+            f"({fuera_de_rango.size} valores inválidos)"
+        )
+
+    timestamps = pd.DatetimeIndex(pd.to_datetime(timestamps_str, format='ISO8601'))
+
+    r = predecir_consumo_lote(
+        timestamps, temperaturas, es_periodo_clases, es_feriado, es_examen
+    )
+    r['timestamps'] = list(timestamps_str)
+    r['dia_semana'] = timestamps.day_name()
+    return r
+
+
+def perfil_diario(timestamps: pd.DatetimeIndex, temperatura_promedio: float,
+                  es_periodo_clases: bool = True):
+    """
+    Perfil usado para pronósticos de rango: la temperatura oscila ±4 °C
+    alrededor del promedio según la hora y los fines de semana no hay clases.
+    """
+    hora = np.asarray(timestamps.hour)
+    temperaturas = temperatura_promedio + 4 * np.sin(2 * np.pi * (hora - 6) / 24)
+    es_clases = (np.asarray(timestamps.dayofweek) < 5) & bool(es_periodo_clases)
+    return temperaturas, es_clases
+
+
+def calcular_factura_mensual(mes_año: str, temperatura_promedio: float,
+                             es_periodo_clases: bool = True) -> dict:
+    """
+    Calcula la factura completa de un mes en un solo lote
+    """
+    # Crear todos los intervalos del mes
+    start = f'{mes_año}-01 00:00:00'
+    end = pd.Timestamp(start) + pd.DateOffset(months=1) - pd.Timedelta(minutes=15)
+    timestamps = pd.date_range(start=start, end=end, freq='15min')
+
+    temperaturas, es_clases = perfil_diario(
+        timestamps, temperatura_promedio, es_periodo_clases
+    )
+    r = predecir_consumo_lote(timestamps, temperaturas, es_periodo_clases=es_clases)
+
+    return resumir_factura(
+        mes_año, r['consumo_kwh'], r['costo_aud_15min'], r['es_horario_peak'],
+        num_dias=timestamps[-1].day
+    )
+
+
+def resumir_factura(mes_año: str, consumo: np.ndarray, costos: np.ndarray,
+                    peak: np.ndarray, num_dias: int) -> dict:
+    """Totales de un mes a partir del consumo y costo (redondeados) por intervalo"""
+    consumo_total = float(consumo.sum())
+    costo_total = float(costos.sum())
+    costo_peak = float(costos[peak].sum())
+    costo_offpeak = float(costos[~peak].sum())
+    intervalos_peak = int(peak.sum())
+    intervalos_offpeak = len(costos) - intervalos_peak
+
+    return {
+        'mes': mes_año,
+        'consumo_total_kwh': round(consumo_total, 2),
+        'factura_total_aud': round(costo_total, 2),
+        'costo_peak_aud': round(costo_peak, 2),
+        'costo_offpeak_aud': round(costo_offpeak, 2),
+        'porcentaje_peak': round(costo_peak / costo_total * 100, 1),
+        'costo_promedio_diario': round(costo_total / num_dias, 2),
+        'consumo_promedio_diario': round(consumo_total / num_dias, 2),
+        'intervalos_peak': intervalos_peak,
+        'intervalos_offpeak': intervalos_offpeak
+    }
+
+
+def pronosticar_por_bloques(fecha_inicio: str, fecha_fin: str,
+                            temperatura_promedio: float,
+                            es_periodo_clases: bool = True,
+                            dias_por_bloque: int = 7):
+    """
+    Generador que pronostica el rango [fecha_inicio, fecha_fin] (días completos)
+    bloque a bloque.
+
+    Cada bloque es un DataFrame con una fila por intervalo de 15 min; sólo un
+    bloque vive en memoria a la vez, sin importar el largo del horizonte.
+    """
+    inicio = pd.Timestamp(fecha_inicio).normalize()
+    fin = pd.Timestamp(fecha_fin).normalize() + pd.Timedelta(days=1)
+    paso = pd.Timedelta(days=dias_por_bloque)
+
+    while inicio < fin:
+        limite = min(inicio + paso, fin)
+        timestamps = pd.date_range(
+            start=inicio, end=limite - pd.Timedelta(minutes=15), freq='15min'
+        )
+        temperaturas, es_clases = perfil_diario(
+            timestamps, temperatura_promedio, es_periodo_clases
+        )
+        r = predecir_consumo_lote(timestamps, temperaturas, es_periodo_clases=es_clases)
+
+        yield pd.DataFrame({
+            'timestamp': timestamps.strftime('%Y-%m-%dT%H:%M:%S'),
+            'consumo_kwh': r['consumo_kwh'],
+            'precio_aud_kwh': r['precio_aud_kwh'],
+            'costo_aud_15min': r['costo_aud_15min'],
+            'es_horario_peak': r['es_horario_peak']
+        })
+        inicio = limite
@@ -0,0 +1,191 @@
+"""
+Proyección de facturas para varios meses
+========================================
+Un presupuesto anual equivale a 12 llamadas a `calcular_factura_mensual`,
+cada una con su propio `pd.date_range` y sus features de calendario. Aquí:
+
+- el calendario del rango (features de hora/día, horario pico, oscilación
+  diaria de temperatura y límites de cada mes) se calcula una vez y queda en
+  un cache LRU chico (unos 4 MB por entrada de 24 meses), porque los mismos
+  rangos se piden para todas las sedes;
+- la temperatura de cada mes se expande a sus intervalos y el modelo evalúa
+  el rango completo por trozos de ML_PROYECCION_TROZO filas, así la memoria
+  de la matriz de features no crece con el horizonte;
+- los totales se agregan por mes (los mismos valores que
+  `calcular_factura_mensual` con la temperatura del mes) y por cada banda del
+  esquema de tarifa (ver motor_tarifas).
+"""
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from ml_app.dashboard.motor_tarifas import (
+    DIA_FERIADO, FRANJAS_POR_DIA, TARIFA_POR_DEFECTO, EsquemaTarifa, indice_calendario
+)
+from ml_app.dashboard.predictor_tarifa import (
+    columnas_calendario, construir_matriz_features, obtener_modelo_consumo, resumir_factura
+)
+from ml_app.models.schemas_tarifa import MAX_MESES_PROYECCION
+
+FILAS_POR_TROZO = int(os.getenv("ML_PROYECCION_TROZO", "8192"))
+
+
+class CalendarioIntervalos:
+    """Columnas de calendario (sólo lectura) de todos los intervalos de un rango de meses"""
+
+    __slots__ = ("inicio", "meses", "columnas", "limites", "dias", "oscilacion", "laborable",
+                 "indice_tarifa")
+
+    def __init__(self, mes_inicio: str, num_meses: int):
+        inicio = self.inicio = pd.Timestamp(f'{mes_inicio}-01')
+        fin = inicio + pd.DateOffset(months=num_meses)
+        timestamps = pd.date_range(start=inicio, end=fin - pd.Timedelta(minutes=15), freq='15min')
+
+        inicios_mes = pd.date_range(start=inicio, periods=num_meses + 1, freq='MS')
+        self.meses = [f.strftime('%Y-%m') for f in inicios_mes[:-1]]
+        self.limites = timestamps.searchsorted(inicios_mes[:-1]).tolist() + [len(timestamps)]
+        self.dias = [int(d) for d in inicios_mes[:-1].days_in_month]
+
+        # Las columnas enteras (hora, día, mes, indicadores) caben en int8;
+        # al armar la matriz de features se convierten a float64 igual
+        self.columnas = {
+            nombre: col.astype(np.int8) if col.dtype.kind == 'i' else col
+            for nombre, col in columnas_calendario(timestamps).items()
+        }
+        hora = self.columnas['hour']
+        # Igual que perfil_diario: ±4 °C alrededor del promedio según la hora
+        self.oscilacion = 4 * np.sin(2 * np.pi * (hora - 6) / 24)
+        self.laborable = self.columnas['dayofweek'] < 5
+        # Posición de cada intervalo en las tablas del motor de tarifas
+        self.indice_tarifa = indice_calendario(timestamps)
+        for arreglo in (*self.columnas.values(), self.oscilacion, self.laborable,
+                        self.indice_tarifa):
+            arreglo.setflags(write=False)
+
+    def mascara_feriados(self, feriados=None) -> np.ndarray:
+        """True en los intervalos de los días de `feriados` (fechas fuera del rango se ignoran)"""
+        mascara = np.zeros(len(self), dtype=bool)
+        if feriados:
+            for fecha in set(pd.to_datetime(feriados).normalize()):
+                a = (fecha - self.inicio).days * FRANJAS_POR_DIA
+                if 0 <= a < len(self):
+                    mascara[a:a + FRANJAS_POR_DIA] = True
+        return mascara
+
+    def indice_tarifa_con_feriados(self, es_feriado: np.ndarray) -> np.ndarray:
+        """indice_tarifa con los intervalos de `es_feriado` en la fila de feriados del motor"""
+        if not es_feriado.any():
+            return self.indice_tarifa
+        indice = self.indice_tarifa.copy()
+        dia = indice[es_feriado] // FRANJAS_POR_DIA % 8
+        indice[es_feriado] += (DIA_FERIADO - dia) * FRANJAS_POR_DIA
+        return indice
+
+    @property
+    def intervalos_por_mes(self) -> np.ndarray:
+        return np.diff(self.limites)
+
+    def __len__(self):
+        return self.limites[-1]
+
+
+@lru_cache(maxsize=8)
+def _calendario(mes_inicio: str, num_meses: int) -> CalendarioIntervalos:
+    return CalendarioIntervalos(mes_inicio, num_meses)
+
+
+def obtener_calendario(mes_inicio: str, num_meses: int) -> CalendarioIntervalos:
+    """
+    Calendario del rango, construido una vez por (mes, num_meses); '2024-1',
+    '2024-01' y ' 2024-01 ' comparten la misma entrada del cache
+    """
+    return _calendario(pd.Timestamp(f'{mes_inicio.strip()}-01').strftime('%Y-%m'), int(num_meses))
+
+
+def predecir_calendario(cal: CalendarioIntervalos, temperaturas_mensuales: list,
+                        es_periodo_clases=True, es_feriado=False,
+                        filas_por_trozo: int = FILAS_POR_TROZO) -> np.ndarray:
+    """
+    Consumo (sin redondear) de cada intervalo del calendario, con una
+    temperatura promedio por mes y el perfil diario de perfil_diario.
+    `es_feriado` es un escalar o un arreglo por intervalo (ver
+    CalendarioIntervalos.mascara_feriados).
+    """
+    m = obtener_modelo_consumo()
+    por_mes = cal.intervalos_por_mes
+    n = len(cal)
+
+    temperaturas = np.repeat(np.asarray(temperaturas_mensuales, dtype=np.float64), por_mes)
+    temperaturas += cal.oscilacion
+    clases_mes = np.broadcast_to(np.asarray(es_periodo_clases, dtype=bool), (len(por_mes),))
+    es_clases = cal.laborable & np.repeat(clases_mes, por_mes)
+    feriado = np.broadcast_to(np.asarray(es_feriado, dtype=bool), (n,))
+
+    consumo = np.empty(n, dtype=np.float64)
+    for inicio in range(0, n, filas_por_trozo):
+        fin = min(inicio + filas_por_trozo, n)
+        trozo = {nombre: col[inicio:fin] for nombre, col in cal.columnas.items()}
+        X = construir_matriz_features(
+            None, temperaturas[inicio:fin], es_clases[inicio:fin], feriado[inicio:fin],
+            m=m, calendario=trozo
+        )
+        consumo[inicio:fin] = m.predecir(X)
+    return consumo
+
+
+def proyectar_facturas(mes_inicio: str, temperaturas_mensuales: list,
+                       es_periodo_clases=True,
+                       tarifa: EsquemaTarifa = TARIFA_POR_DEFECTO,
+                       filas_por_trozo: int = FILAS_POR_TROZO) -> dict:
+    """
+    Factura de cada mes desde `mes_inicio`, uno por temperatura de
+    `temperaturas_mensuales`, más los totales del rango y por banda tarifaria.
+
+    `es_periodo_clases` es un valor único o uno por mes.
+    """
+    num_meses = len(temperaturas_mensuales)
+    if not 1 <= num_meses <= MAX_MESES_PROYECCION:
+        raise ValueError(f"Se pueden proyectar entre 1 y {MAX_MESES_PROYECCION} meses")
+
+    cal = obtener_calendario(mes_inicio, num_meses)
+    consumo = predecir_calendario(cal, temperaturas_mensuales, es_periodo_clases,
+                                  filas_por_trozo=filas_por_trozo)
+    n = len(cal)
+
+    precio, peak = tarifa.aplicar(cal.indice_tarifa)
+    # Mismo redondeo que predecir_consumo_lote
+    costos = np.round(consumo * precio, 4)
+    consumo = np.round(consumo, 2)
+
+    meses = []
+    for i, mes in enumerate(cal.meses):
+        a, b = cal.limites[i], cal.limites[i + 1]
+        meses.append(resumir_factura(mes, consumo[a:b], costos[a:b], peak[a:b], cal.dias[i]))
+
+    bandas_intervalo = tarifa.bandas_de(cal.indice_tarifa)
+    bandas = []
+    for i, banda in enumerate(tarifa.bandas):
+        mascara = bandas_intervalo == i
+        bandas.append({
+            'banda': banda.nombre,
+            'precio_aud_kwh': banda.precio,
+            'es_peak': banda.es_peak,
+            'intervalos': int(mascara.sum()),
+            'consumo_kwh': round(float(consumo[mascara].sum()), 2),
+            'costo_aud': round(float(costos[mascara].sum()), 2),
+        })
+
+    costo_total = float(costos.sum())
+    return {
+        'mes_inicio': cal.meses[0],
+        'mes_fin': cal.meses[-1],
+        'meses': num_meses,
+        'intervalos': n,
+        'consumo_total_kwh': round(float(consumo.sum()), 2),
+        'factura_total_aud': round(costo_total, 2),
+        'porcentaje_peak': round(float(costos[peak].sum()) / costo_total * 100, 1) if costo_total else 0.0,
+        'por_mes': meses,
+        'por_banda': bandas,
+    }
@@ -0,0 +1,191 @@
+"""
+Registro de modelos ML - carga perezosa y compartida de artefactos
+==================================================================
+Cada artefacto de `ml_app/modelos` se carga una sola vez por proceso, la
+primera vez que se pide (o en el warm-up con `precargar`), y se comparte
+entre todos los routers.
+
+Si el archivo del artefacto cambia en disco, el registro lo vuelve a cargar
+durante la siguiente petición que lo use y reemplaza la referencia de forma
+atómica: las peticiones en curso terminan con la versión anterior y las
+nuevas usan la nueva, sin reiniciar los workers de uvicorn.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+
+import joblib
+
+MODEL_DIR = Path(os.getenv("ML_MODELOS_DIR", Path(__file__).parent.parent / "modelos"))
+
+# Cada cuántos segundos se revisa si el archivo cambió (0 desactiva la revisión)
+INTERVALO_VERIFICACION = float(os.getenv("ML_MODELOS_VERIFICAR_SEG", "30"))
+
+
+class ArtefactoCargado:
+    """Artefacto ya preparado junto con sus datos de carga"""
+
+    __slots__ = ("nombre", "ruta", "valor", "version", "mtime",
+                 "cargado_en", "segundos_carga", "proxima_verificacion")
+
+    def __init__(self, nombre, ruta, valor, version, mtime, segundos_carga):
+        self.nombre = nombre
+        self.ruta = ruta
+        self.valor = valor
+        self.version = version
+        self.mtime = mtime
+        self.cargado_en = time.time()
+        self.segundos_carga = segundos_carga
+        self.proxima_verificacion = time.monotonic() + INTERVALO_VERIFICACION
+
+
+class RegistroModelos:
+    """
+    Registro thread-safe de artefactos ML.
+
+    `registrar` declara cómo cargar un artefacto (archivo y, opcionalmente,
+    una función `preparar` que transforma lo deserializado en el objeto que
+    usan las rutas); `obtener` lo devuelve, cargándolo si hace falta.
+    """
+
+    def __init__(self, directorio: Path = MODEL_DIR):
+        self.directorio = Path(directorio)
+        self._definiciones = {}
+        self._artefactos = {}
+        self._versiones = {}
+        self._locks = {}
+        self._lock_registro = threading.Lock()
+
+    def registrar(self, nombre: str, archivo: str, preparar=None, cargar=None):
+        """
+        Declara un artefacto. `cargar(ruta)` reemplaza a joblib.load y
+        `preparar(objeto)` construye el valor final que se comparte.
+        """
+        with self._lock_registro:
+            self._definiciones[nombre] = (archivo, preparar, cargar or joblib.load)
+            self._locks.setdefault(nombre, threading.Lock())
+
+    def obtener(self, nombre: str):
+        """Devuelve el artefacto cargado, cargándolo en la primera llamada"""
+        artefacto = self._artefactos.get(nombre)
+        if artefacto is None:
+            return self._cargar(nombre).valor
+
+        if INTERVALO_VERIFICACION > 0 and time.monotonic() >= artefacto.proxima_verificacion:
+            self._verificar_cambios(nombre, artefacto)
+            artefacto = self._artefactos[nombre]
+
+        return artefacto.valor
+
+    def version(self, nombre: str) -> int:
+        """Número de veces que se ha cargado el artefacto (0 si nunca)"""
+        return self._versiones.get(nombre, 0)
+
+    def precargar(self, nombres=None) -> dict:
+        """Carga los artefactos indicados (o todos) y devuelve el estado"""
+        for nombre in nombres or list(self._definiciones):
+            if nombre not in self._artefactos:
+                self._cargar(nombre)
+        return self.estado()
+
+    def recargar(self, nombre: str, archivo: str = None):
+        """
+        Carga de nuevo un artefacto (opcionalmente desde otro archivo) y lo
+        reemplaza de forma atómica.
+        """
+        if archivo is None:
+            return self._cargar(nombre, forzar=True).valor
+
+        anterior = self._definiciones[nombre]
+        self.registrar(nombre, archivo, anterior[1], anterior[2])
+        try:
+            return self._cargar(nombre, forzar=True).valor
+        except Exception:
+            # Si el archivo nuevo no carga, se sigue sirviendo el anterior
+            self._definiciones[nombre] = anterior
+            raise
+
+    def estado(self) -> dict:
+        """Estado de carga y tiempos de cada artefacto registrado"""
+        estado = {}
+        for nombre, (archivo, _, _) in self._definiciones.items():
+            artefacto = self._artefactos.get(nombre)
+            if artefacto is None:
+                estado[nombre] = {"cargado": False, "archivo": archivo}
+                continue
+            estado[nombre] = {
+                "cargado": True,
+                "archivo": str(artefacto.ruta.name),
+                "version": artefacto.version,
+                "cargado_en": artefacto.cargado_en,
+                "segundos_carga": round(artefacto.segundos_carga, 4),
+            }
+        return estado
+
+    def _ruta(self, nombre: str) -> Path:
+        if nombre not in self._definiciones:
+            raise KeyError(f"Artefacto no registrado: {nombre}")
+        archivo = Path(self._definiciones[nombre][0])
+        return archivo if archivo.is_absolute() else self.directorio / archivo
+
+    def _cargar(self, nombre: str, forzar: bool = False) -> ArtefactoCargado:
+        ruta = self._ruta(nombre)
+        with self._locks[nombre]:
+            # Otro hilo pudo terminar la carga mientras esperábamos el lock
+            actual = self._artefactos.get(nombre)
+            if actual is not None and not forzar:
+                return actual
+
+            _, preparar, cargar = self._definiciones[nombre]
+            print(f"Cargando artefacto ML '{nombre}' ({ruta.name})...")
+            inicio = time.perf_counter()
+            mtime = ruta.stat().st_mtime
+            valor = cargar(ruta)
+            if preparar is not None:
+                valor = preparar(valor)
+            segundos = time.perf_counter() - inicio
+
+            version = self._versiones.get(nombre, 0) + 1
+            artefacto = ArtefactoCargado(nombre, ruta, valor, version, mtime, segundos)
+            self._artefactos[nombre] = artefacto
+            self._versiones[nombre] = version
+            print(f"✓ Artefacto '{nombre}' v{version} cargado en {segundos:.2f} s")
+            return artefacto
+
+    def _verificar_cambios(self, nombre: str, artefacto: ArtefactoCargado):
+        # Sólo un hilo revisa; los demás siguen con la versión actual
+        lock = self._locks[nombre]
+        if not lock.acquire(blocking=False):
+            return
+        try:
+            artefacto.proxima_verificacion = time.monotonic() + INTERVALO_VERIFICACION
+            try:
+                cambio = artefacto.ruta.stat().st_mtime != artefacto.mtime
+            except OSError:
+                return
+        finally:
+            lock.release()
+
+        if cambio:
+            try:
+                self._cargar(nombre, forzar=True)
+            except Exception as e:
+                # Un artefacto a medio copiar no debe tumbar el servicio
+                print(f"Advertencia: no se pudo recargar '{nombre}': {e}")
+
+
+registro = RegistroModelos()
+
+
+def precargar_antes_de_fork():
+    """
+    Carga todos los artefactos en el proceso maestro (gunicorn --preload) y
+    congela el GC para que los workers compartan esas páginas copy-on-write
+    en lugar de tener cada uno su propia copia de los modelos.
+    """
+    import gc
+
+    registro.precargar()
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,114 @@
+"""
+Simulador de tarifas - varios esquemas sobre una misma curva de consumo
+=======================================================================
+El consumo del período se predice una sola vez (ver proyeccion). Como el
+precio de un esquema sólo depende de la posición del intervalo en la tabla
+(mes, día, franja) del motor de tarifas, el consumo se acumula primero por
+esa posición con un bincount (9216 casillas, sin importar el largo del
+período). La factura de los N esquemas es entonces un solo producto matriz
+por vector:
+
+    totales = P @ consumo_por_casilla      # P: (esquemas, 9216)
+
+Cada esquema extra cuesta una fila de P, no otra predicción.
+
+Los totales se calculan sin redondear cada intervalo, así que pueden
+diferir en centavos de /predict/monthly, que redondea el costo de cada
+intervalo a 4 decimales antes de sumar.
+"""
+import numpy as np
+
+from ml_app.dashboard.motor_tarifas import FORMA_TABLA, TARIFA_POR_DEFECTO, EsquemaTarifa
+from ml_app.dashboard.proyeccion import FILAS_POR_TROZO, obtener_calendario, predecir_calendario
+from ml_app.models.schemas_tarifa import MAX_ESQUEMAS_TARIFA, MAX_MESES_PROYECCION
+
+CASILLAS_TABLA = int(np.prod(FORMA_TABLA))
+
+
+def comparar_esquemas(consumo: np.ndarray, indice: np.ndarray, esquemas: list) -> list:
+    """
+    Factura de cada esquema para el consumo dado (un valor por intervalo) y
+    el índice plano de cada intervalo en las tablas del motor
+    """
+    por_casilla = np.bincount(indice, weights=consumo, minlength=CASILLAS_TABLA)
+
+    precios = np.stack([e.tabla_precio.ravel() for e in esquemas])
+    peak = np.stack([e.tabla_peak.ravel() for e in esquemas])
+    totales = precios @ por_casilla
+    totales_peak = (precios * peak) @ por_casilla
+    consumo_peak = peak @ por_casilla
+
+    resultados = []
+    for k, esquema in enumerate(esquemas):
+        por_banda = np.bincount(
+            esquema.tabla_banda.ravel(), weights=por_casilla, minlength=len(esquema.bandas)
+        )
+        total = float(totales[k])
+        resultados.append({
+            'nombre': esquema.nombre,
+            'factura_total_aud': round(total, 2),
+            'costo_peak_aud': round(float(totales_peak[k]), 2),
+            'costo_offpeak_aud': round(total - float(totales_peak[k]), 2),
+            'consumo_peak_kwh': round(float(consumo_peak[k]), 2),
+            'porcentaje_peak': round(float(totales_peak[k]) / total * 100, 1) if total else 0.0,
+            'por_banda': [
+                {
+                    'banda': banda.nombre,
+                    'precio_aud_kwh': banda.precio,
+                    'es_peak': banda.es_peak,
+                    'consumo_kwh': round(float(por_banda[i]), 2),
+                    'costo_aud': round(float(por_banda[i]) * banda.precio, 2),
+                }
+                for i, banda in enumerate(esquema.bandas)
+            ],
+        })
+    return resultados
+
+
+def simular_tarifas(mes_inicio: str, temperaturas_mensuales: list, esquemas: list,
+                    es_periodo_clases=True, feriados=None, incluir_actual: bool = True,
+                    filas_por_trozo: int = FILAS_POR_TROZO) -> dict:
+    """
+    Predice el consumo de los meses indicados una vez y lo tarifica con cada
+    esquema; con `incluir_actual` la tarifa vigente va primero y cada
+    resultado trae su diferencia contra ella
+    """
+    num_meses = len(temperaturas_mensuales)
+    if not 1 <= num_meses <= MAX_MESES_PROYECCION:
+        raise ValueError(f"Se pueden simular entre 1 y {MAX_MESES_PROYECCION} meses")
+    if len(esquemas) > MAX_ESQUEMAS_TARIFA:
+        raise ValueError(f"Se pueden comparar hasta {MAX_ESQUEMAS_TARIFA} esquemas")
+    if not esquemas and not incluir_actual:
+        raise ValueError("No hay esquemas de tarifa para comparar")
+
+    cal = obtener_calendario(mes_inicio, num_meses)
+    es_feriado = cal.mascara_feriados(feriados)
+    consumo = predecir_calendario(cal, temperaturas_mensuales, es_periodo_clases, es_feriado,
+                                  filas_por_trozo=filas_por_trozo)
+
+    resultados = []
+    if incluir_actual:
+        # La tarifa vigente no tiene bandas de feriado: con la fila de
+        # feriados sus horas pico quedarían a precio base, así que se
+        # tarifica con el día de la semana real
+        resultados += comparar_esquemas(consumo, cal.indice_tarifa, [TARIFA_POR_DEFECTO])
+    if esquemas:
+        resultados += comparar_esquemas(consumo, cal.indice_tarifa_con_feriados(es_feriado),
+                                        list(esquemas))
+    if incluir_actual:
+        base = resultados[0]['factura_total_aud']
+        for r in resultados:
+            r['diferencia_vs_actual_aud'] = round(r['factura_total_aud'] - base, 2)
+
+    return {
+        'mes_inicio': cal.meses[0],
+        'mes_fin': cal.meses[-1],
+        'intervalos': len(cal),
+        'consumo_total_kwh': round(float(consumo.sum()), 2),
+        'esquemas': resultados,
+    }
+
+
+def esquemas_desde_dicts(datos: list) -> list:
+    """Compila los esquemas recibidos por la API (ValueError si alguno es inválido)"""
+    return [EsquemaTarifa.desde_dict(d) for d in datos]
@@ -9,14 +9,16 @@ Microservicio de Machine Learning para:
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from ml_app.routes.tarifas import tarifas
-from ml_app.routes.peak_shaving import peak_saving
+from ml_app.routes.peak_shaving import router as router_peak_shaving
+from ml_app.routes.modelos import router_modelos
+from ml_app.routes.preparacion import router_preparacion
+from ml_app.dashboard.registro_modelos import precargar_antes_de_fork
+from ml_app.dashboard.calentamiento import calentador
+from app.instrumentacion.metricas import MiddlewareMetricas, router_metricas
+from app.instrumentacion.perfilado import instalar_perfilado
 import uvicorn
 import os
 
-# Routers ML
-from app.routes import peak_shaving
-from ml_app.routes.routers_tarifas import router_prediccion
-
 # Crear aplicación FastAPI
 app = FastAPI(
     title="Solar Health - Machine Learning API",
@@ -33,9 +35,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latencia por ruta, expuesta en /metrics
+app.add_middleware(MiddlewareMetricas)
+
+# Perfilado bajo demanda (sólo si PERFIL_MUESTREO o PERFIL_TOKEN están definidos)
+instalar_perfilado(app)
+
 # Incluir routers
 app.include_router(tarifas)
-app.include_router(peak_saving)
+app.include_router(router_peak_shaving)
+app.include_router(router_modelos)
+app.include_router(router_metricas)
+app.include_router(router_preparacion)
+
+# Con gunicorn --preload los modelos se cargan una vez en el maestro
+if os.getenv("ML_PRECARGAR_MODELOS") == "1":
+    precargar_antes_de_fork()
+
+# Predicciones de prueba en segundo plano; /ready responde 503 hasta que terminan
+@app.on_event("startup")
+def calentar_modelos():
+    calentador.iniciar_en_segundo_plano()
 
 # Endpoint raíz
 @app.get("/")
@@ -1,5 +1,12 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from datetime import date
+from typing import Annotated, List, Literal, Optional, Union
+
+# Límites de los requests; los módulos de dashboard los importan de aquí
+MAX_PUNTOS_LOTE = 100_000
+MAX_DIAS_PRONOSTICO = 3660
+MAX_MESES_PROYECCION = 24
+MAX_ESQUEMAS_TARIFA = 200
 
 class PrediccionPuntualRequest(BaseModel):
     """Request para predicción de un momento específico"""
@@ -126,3 +133,290 @@ class FacturaMensualResponse(BaseModel):
                 "intervalos_offpeak": 1620
             }
         }
+
+
+
+class PeriodoMensualRequest(BaseModel):
+    """Campos comunes de los requests que evalúan varios meses seguidos"""
+    mes_inicio: str = Field(
+        ...,
+        pattern=r'^\d{4}-\d{2}$',
+        example="2026-01",
+        description="Primer mes del período (YYYY-MM)"
+    )
+    temperaturas_mensuales: List[float] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_MESES_PROYECCION,
+        description="Temperatura promedio en °C de cada mes, desde mes_inicio (rango -10 a 50)"
+    )
+    es_periodo_clases: Union[bool, List[bool]] = Field(
+        True,
+        description="Valor único para todos los meses o uno por mes"
+    )
+
+    @model_validator(mode='after')
+    def validar_meses(self):
+        for i, t in enumerate(self.temperaturas_mensuales):
+            if not -10 <= t <= 50:
+                raise ValueError(f"temperaturas_mensuales[{i}]={t} fuera del rango [-10, 50]")
+        n = len(self.temperaturas_mensuales)
+        if isinstance(self.es_periodo_clases, list) and len(self.es_periodo_clases) != n:
+            raise ValueError(
+                f"'es_periodo_clases' tiene {len(self.es_periodo_clases)} valores, se esperaban {n}"
+            )
+        return self
+
+
+class ProyeccionFacturasRequest(PeriodoMensualRequest):
+    """Request para proyectar la factura de varios meses (p. ej. un año)"""
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "mes_inicio": "2026-01",
+                "temperaturas_mensuales": [22.0, 22.5, 21.0, 18.5, 15.0, 12.5,
+                                           11.5, 12.5, 15.0, 17.5, 19.5, 21.0],
+                "es_periodo_clases": [False, True, True, True, True, True,
+                                      False, True, True, True, True, False]
+            }
+        }
+
+
+class BandaTarifaria(BaseModel):
+    """Totales de una banda tarifaria en el período proyectado"""
+    banda: str = Field(..., description="Nombre de la banda (p. ej. peak, off_peak)")
+    precio_aud_kwh: float
+    es_peak: bool
+    intervalos: int
+    consumo_kwh: float
+    costo_aud: float
+
+
+class ProyeccionFacturasResponse(BaseModel):
+    """Response con la factura de cada mes y los totales del período"""
+    mes_inicio: str
+    mes_fin: str
+    meses: int = Field(..., description="Número de meses proyectados")
+    intervalos: int = Field(..., description="Intervalos de 15 min evaluados")
+    consumo_total_kwh: float
+    factura_total_aud: float
+    porcentaje_peak: float = Field(..., description="Porcentaje del costo en peak")
+    por_mes: List[FacturaMensualResponse]
+    por_banda: List[BandaTarifaria]
+
+
+class BandaTarifaSchema(BaseModel):
+    """Banda de un esquema de tarifa (la primera que cubre un intervalo gana)"""
+    nombre: str = Field(..., min_length=1, max_length=50)
+    precio: float = Field(..., ge=0, description="AUD/kWh")
+    es_peak: bool = Field(False, description="¿Cuenta como horario pico?")
+    dias: List[Annotated[int, Field(ge=0, le=7)]] = Field(
+        [0, 1, 2, 3, 4, 5, 6],
+        min_length=1,
+        max_length=8,
+        description="0=lunes ... 6=domingo, 7=feriado"
+    )
+    hora_inicio: float = Field(0, ge=0, le=24, description="Hora de inicio (múltiplo de 0.25)")
+    hora_fin: float = Field(24, ge=0, le=24, description="Hora de fin; si es <= inicio cruza la medianoche")
+    meses: List[Annotated[int, Field(ge=1, le=12)]] = Field(
+        list(range(1, 13)),
+        min_length=1,
+        max_length=12,
+        description="Meses en que aplica (1-12)"
+    )
+
+
+class EsquemaTarifaSchema(BaseModel):
+    """Esquema de tarifa: bandas más un precio base para lo que no cubren"""
+    nombre: str = Field(..., min_length=1, max_length=100)
+    precio_base: float = Field(..., ge=0, description="AUD/kWh fuera de las bandas")
+    bandas: List[BandaTarifaSchema] = Field(..., min_length=1, max_length=50)
+
+
+class ComparacionTarifasRequest(PeriodoMensualRequest):
+    """Request para tarificar una misma curva de consumo con varios esquemas"""
+    feriados: List[date] = Field(
+        [],
+        description="Fechas que se tarifican con las bandas de feriado (día 7)"
+    )
+    esquemas: List[EsquemaTarifaSchema] = Field(..., min_length=1, max_length=MAX_ESQUEMAS_TARIFA)
+    incluir_actual: bool = Field(True, description="Agregar la tarifa vigente como referencia")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "mes_inicio": "2026-06",
+                "temperaturas_mensuales": [12.5],
+                "es_periodo_clases": True,
+                "feriados": ["2026-06-08"],
+                "esquemas": [
+                    {
+                        "nombre": "tres_bandas",
+                        "precio_base": 0.12,
+                        "bandas": [
+                            {"nombre": "peak", "precio": 0.42, "es_peak": True,
+                             "dias": [0, 1, 2, 3, 4], "hora_inicio": 15, "hora_fin": 21},
+                            {"nombre": "shoulder", "precio": 0.24,
+                             "dias": [0, 1, 2, 3, 4], "hora_inicio": 7, "hora_fin": 22}
+                        ]
+                    },
+                    {
+                        "nombre": "plana",
+                        "precio_base": 0.26,
+                        "bandas": [{"nombre": "plana", "precio": 0.26}]
+                    }
+                ],
+                "incluir_actual": True
+            }
+        }
+
+
+class BandaResultado(BaseModel):
+    banda: str
+    precio_aud_kwh: float
+    es_peak: bool
+    consumo_kwh: float
+    costo_aud: float
+
+
+class ResultadoEsquema(BaseModel):
+    """Factura del período con un esquema"""
+    nombre: str
+    factura_total_aud: float
+    costo_peak_aud: float
+    costo_offpeak_aud: float
+    consumo_peak_kwh: float
+    porcentaje_peak: float
+    diferencia_vs_actual_aud: Optional[float] = Field(
+        None, description="Factura menos la de la tarifa vigente (si se incluyó)"
+    )
+    por_banda: List[BandaResultado]
+
+
+class ComparacionTarifasResponse(BaseModel):
+    """Response con la factura del mismo consumo bajo cada esquema"""
+    mes_inicio: str
+    mes_fin: str
+    intervalos: int = Field(..., description="Intervalos de 15 min evaluados")
+    consumo_total_kwh: float
+    esquemas: List[ResultadoEsquema]
+
+
+class PrediccionLoteRequest(BaseModel):
+    """Request columnar para predecir muchos momentos en una sola llamada"""
+    timestamps: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_PUNTOS_LOTE,
+        description="Fechas y horas en formato ISO 8601"
+    )
+    temperaturas: List[float] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_PUNTOS_LOTE,
+        description="Temperatura en °C para cada timestamp (rango -10 a 50)"
+    )
+    es_periodo_clases: Union[bool, List[bool]] = Field(
+        True,
+        description="Valor único para todos los puntos o uno por timestamp"
+    )
+    es_feriado: Union[bool, List[bool]] = Field(
+        False,
+        description="Valor único para todos los puntos o uno por timestamp"
+    )
+    es_examen: Union[bool, List[bool]] = Field(
+        False,
+        description="Valor único para todos los puntos o uno por timestamp"
+    )
+
+    @model_validator(mode='after')
+    def validar_largos(self):
+        n = len(self.timestamps)
+        columnas = {
+            'temperaturas': self.temperaturas,
+            'es_periodo_clases': self.es_periodo_clases,
+            'es_feriado': self.es_feriado,
+            'es_examen': self.es_examen,
+        }
+        for nombre, valores in columnas.items():
+            if isinstance(valores, list) and len(valores) != n:
+                raise ValueError(
+                    f"'{nombre}' tiene {len(valores)} valores, se esperaban {n}"
+                )
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "timestamps": ["2026-06-15T14:30:00", "2026-06-15T14:45:00"],
+                "temperaturas": [18.5, 18.7],
+                "es_periodo_clases": True,
+                "es_feriado": False,
+                "es_examen": [False, True]
+            }
+        }
+
+
+class PrediccionLoteResponse(BaseModel):
+    """Response columnar: la posición i de cada lista corresponde al timestamp i"""
+    total: int = Field(..., description="Número de puntos predichos")
+    timestamps: List[str]
+    dia_semana: List[str]
+    consumo_kwh: List[float]
+    precio_aud_kwh: List[float]
+    costo_aud_15min: List[float]
+    costo_aud_hora: List[float]
+    es_horario_peak: List[bool]
+
+
+class PronosticoStreamRequest(BaseModel):
+    """Request para pronóstico de largo plazo entregado en streaming"""
+    fecha_inicio: str = Field(
+        ...,
+        pattern=r'^\d{4}-\d{2}-\d{2}$',
+        example="2026-01-01",
+        description="Primer día del pronóstico (YYYY-MM-DD)"
+    )
+    fecha_fin: str = Field(
+        ...,
+        pattern=r'^\d{4}-\d{2}-\d{2}$',
+        example="2026-12-31",
+        description="Último día del pronóstico, inclusive (YYYY-MM-DD)"
+    )
+    temperatura_promedio: float = Field(
+        ...,
+        ge=-10,
+        le=50,
+        example=16.0,
+        description="Temperatura promedio del período en °C"
+    )
+    es_periodo_clases: Optional[bool] = Field(
+        True,
+        example=True,
+        description="¿El período está dentro del calendario académico?"
+    )
+    formato: Literal['ndjson', 'arrow'] = Field(
+        'ndjson',
+        description="ndjson (una fila JSON por intervalo) o arrow (Arrow IPC stream)"
+    )
+
+    @model_validator(mode='after')
+    def validar_rango(self):
+        dias = (date.fromisoformat(self.fecha_fin) - date.fromisoformat(self.fecha_inicio)).days + 1
+        if dias < 1:
+            raise ValueError("fecha_fin debe ser igual o posterior a fecha_inicio")
+        if dias > MAX_DIAS_PRONOSTICO:
+            raise ValueError(f"El horizonte máximo es de {MAX_DIAS_PRONOSTICO} días")
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "fecha_inicio": "2026-01-01",
+                "fecha_fin": "2026-12-31",
+                "temperatura_promedio": 16.0,
+                "es_periodo_clases": True,
+                "formato": "ndjson"
+            }
+        }
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from pathlib import Path
+from typing import Optional
+import hmac
+import os
+
+from ml_app.dashboard.registro_modelos import registro
+
+# Protege las rutas que cambian el estado de los modelos (cabecera X-Admin-Token)
+ML_ADMIN_TOKEN = os.getenv("ML_ADMIN_TOKEN", "")
+
+router_modelos = APIRouter(prefix="/ml/modelos", tags=["Machine Learning - Modelos"])
+
+
+def verificar_token_admin(x_admin_token: Optional[str] = Header(None)):
+    # Sin token configurado las rutas de administración quedan cerradas
+    if not ML_ADMIN_TOKEN or not hmac.compare_digest((x_admin_token or "").encode(), ML_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+
+@router_modelos.get("/")
+def estado_modelos():
+    """Estado de carga, versión y tiempo de carga de cada artefacto"""
+    return registro.estado()
+
+
+@router_modelos.post("/precargar", dependencies=[Depends(verificar_token_admin)])
+def precargar_modelos():
+    """Carga todos los artefactos registrados que aún no estén en memoria"""
+    try:
+        return registro.precargar()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al precargar modelos: {str(e)}")
+
+
+@router_modelos.post("/{nombre}/recargar", dependencies=[Depends(verificar_token_admin)])
+def recargar_modelo(nombre: str, archivo: str = None):
+    """
+    Vuelve a cargar un artefacto (opcionalmente desde otro archivo de
+    `ml_app/modelos`) sin reiniciar el worker
+    """
+    if archivo is not None and Path(archivo).name != archivo:
+        raise HTTPException(status_code=400, detail="El archivo debe estar en ml_app/modelos")
+    try:
+        registro.recargar(nombre, archivo)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Artefacto no registrado: {nombre}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al recargar '{nombre}': {str(e)}")
+    return registro.estado()[nombre]
@@ -1,43 +1,134 @@
-from fastapi import APIRouter
-import joblib
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+import numpy as np
+import pandas as pd
 import os
 
+from ml_app.dashboard.registro_modelos import registro
+from ml_app.dashboard.calentamiento import calentador
+from ml_app.dashboard.micro_lotes import AgrupadorMicroLotes
+
 router = APIRouter(
     prefix="/ml/peak-shaving",
     tags=["Machine Learning - Peak Shaving"]
 )
 
-MODEL_PATH = os.path.join(
-    os.path.dirname(__file__),
-    "..",
-    "modelos",
-    "peak_shaving_model.pkl"
-)
-
-model = joblib.load(MODEL_PATH)
-print("Features del modelo:", model.feature_names_in_)
+registro.registrar('peak_shaving', 'peak_shaving_model.pkl')
 
+# 31 días de programa como máximo
+MAX_HORAS_PROGRAMA = 31 * 24
 
 
 class PeakShavingInput(BaseModel):
-    hour: int           # 0–23
-    dayofweek: int      # 0=lunes ... 6=domingo
+    hour: int = Field(..., ge=0, le=23)
+    dayofweek: int = Field(..., ge=0, le=6, description="0=lunes ... 6=domingo")
     solar_generation: float
 
 
+class PeakShavingScheduleInput(BaseModel):
+    start: datetime = Field(..., description="Primera hora del programa (se trunca a la hora)")
+    solar_generation: List[float] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_HORAS_PROGRAMA,
+        description="Generación solar esperada de cada hora desde start (24 = un día, 168 = una semana)"
+    )
 
-import pandas as pd
 
-@router.post("/predict")
-def predict_peak_shaving(data: PeakShavingInput):
+def predecir_lote_peak_shaving(entradas: list) -> list:
+    """Evalúa varias entradas de peak shaving con una sola llamada al modelo"""
+    model = registro.obtener('peak_shaving')
 
-    X = pd.DataFrame([{
-        "hour": data.hour,
-        "dayofweek": data.dayofweek,
-        "SolarGeneration": data.solar_generation
-    }])
+    X = pd.DataFrame({
+        "hour": [e.hour for e in entradas],
+        "dayofweek": [e.dayofweek for e in entradas],
+        "SolarGeneration": [e.solar_generation for e in entradas]
+    })
 
-    prediction = model.predict(X)[0]
+    return model.predict(X).tolist()
+
+
+def ventanas_consecutivas(activo: np.ndarray) -> list:
+    """Pares (inicio, fin) exclusivos de cada tramo de valores True consecutivos"""
+    bordes = np.diff(np.concatenate(([0], activo.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(bordes == 1).tolist(), np.flatnonzero(bordes == -1).tolist()))
+
+
+def programar_peak_shaving(inicio: datetime, generacion: list) -> dict:
+    """
+    Decisión de peak shaving para cada hora desde `inicio`, evaluada con una
+    sola llamada al modelo, y las horas consecutivas agrupadas en ventanas
+    de despacho
+    """
+    model = registro.obtener('peak_shaving')
+
+    horas = pd.date_range(pd.Timestamp(inicio).floor('h'), periods=len(generacion), freq='h')
+    solar = np.asarray(generacion, dtype=np.float64)
+    X = pd.DataFrame({
+        "hour": horas.hour,
+        "dayofweek": horas.dayofweek,
+        "SolarGeneration": solar
+    })
+    # Mismo criterio que /predict: cualquier predicción distinta de cero activa
+    activo = np.asarray(model.predict(X)) != 0
+
+    ventanas = []
+    for a, b in ventanas_consecutivas(activo):
+        ventanas.append({
+            "inicio": horas[a].isoformat(),
+            "fin": (horas[b - 1] + timedelta(hours=1)).isoformat(),
+            "horas": b - a,
+            "solar_generation_total": round(float(solar[a:b].sum()), 4)
+        })
+
+    return {
+        "start": horas[0].isoformat(),
+        "horas": len(horas),
+        "horas_peak_shaving": int(activo.sum()),
+        "programa": [
+            {"timestamp": ts, "hour": h, "dayofweek": d, "solar_generation": g, "peak_shaving": p}
+            for ts, h, d, g, p in zip(
+                horas.strftime('%Y-%m-%dT%H:%M:%S'), horas.hour.tolist(),
+                horas.dayofweek.tolist(), solar.tolist(), activo.tolist()
+            )
+        ],
+        "ventanas": ventanas
+    }
+
+
+def calentar_peak_shaving():
+    """Carga el modelo y evalúa una entrada y un programa de 24 h de prueba"""
+    predecir_lote_peak_shaving([PeakShavingInput(hour=12, dayofweek=2, solar_generation=0.0)])
+    programar_peak_shaving(datetime(2026, 1, 5), [0.0] * 24)
+
+
+calentador.registrar('peak_shaving', calentar_peak_shaving)
+
+
+# Peticiones concurrentes que llegan dentro de la ventana se evalúan juntas
+agrupador = AgrupadorMicroLotes(
+    predecir_lote_peak_shaving,
+    ventana_ms=float(os.getenv("ML_PEAK_LOTE_VENTANA_MS", "2")),
+    max_items=int(os.getenv("ML_PEAK_LOTE_MAX", "64"))
+)
+
+
+def _error_modelo(e: Exception) -> HTTPException:
+    # Sin el archivo del modelo el servicio no está listo (ver /ready)
+    if isinstance(e, OSError):
+        return HTTPException(status_code=503, detail=f"Modelo de peak shaving no disponible: {str(e)}")
+    return HTTPException(status_code=500, detail=f"Error en peak shaving: {str(e)}")
+
+
+@router.post("/predict")
+async def predict_peak_shaving(data: PeakShavingInput):
+    try:
+        prediction = await agrupador.enviar(data)
+    except Exception as e:
+        raise _error_modelo(e)
 
     return {
         "hour": data.hour,
@@ -46,3 +137,25 @@ def predict_peak_shaving(data: PeakShavingInput):
         "peak_shaving": bool(prediction)
     }
 
+
+@router.post("/schedule")
+def schedule_peak_shaving(data: PeakShavingScheduleInput):
+    """
+    Programa de peak shaving hora a hora (p. ej. 24 h o 7 días)
+
+    - **start**: Primera hora del programa
+    - **solar_generation**: Generación solar esperada de cada hora
+
+    Todas las horas se evalúan en un solo lote y las horas consecutivas con
+    peak shaving se devuelven también como ventanas de despacho [inicio, fin).
+    """
+    try:
+        return programar_peak_shaving(data.start, data.solar_generation)
+    except Exception as e:
+        raise _error_modelo(e)
+
+
+@router.get("/estadisticas")
+def estadisticas_micro_lotes():
+    """Lotes procesados y tamaño promedio del micro-batcher"""
+    return agrupador.estadisticas()
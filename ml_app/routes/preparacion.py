@@ -0,0 +1,39 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from ml_app.dashboard.calentamiento import calentador
+from ml_app.dashboard.registro_modelos import registro
+
+router_preparacion = APIRouter(tags=["preparacion"])
+
+
+def _artefactos_cargados() -> tuple:
+    """
+    Sin calentamiento (ML_CALENTAR=0) nadie carga los artefactos antes de
+    la primera petición: se cargan aquí los que falten. Devuelve (listos,
+    error de carga o None).
+    """
+    try:
+        estado = registro.precargar()
+    except Exception as e:
+        return False, f"{type(e).__name__}: {e}"
+    return all(a["cargado"] for a in estado.values()), None
+
+
+@router_preparacion.get("/ready")
+def readiness():
+    """
+    Readiness: 200 cuando los modelos de este servicio ya se cargaron y
+    calentaron, 503 mientras tanto o si alguno falló (ver `tareas`). Con el
+    calentamiento desactivado basta con que todos los artefactos carguen.
+    """
+    contenido = {}
+    if calentador.activo:
+        contenido["ready"] = calentador.listo
+    else:
+        contenido["ready"], error = _artefactos_cargados()
+        if error is not None:
+            contenido["error"] = error
+    contenido.update(calentador.estado())
+    contenido["modelos"] = registro.estado()
+    return JSONResponse(contenido, status_code=200 if contenido["ready"] else 503)
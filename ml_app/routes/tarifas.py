@@ -1,11 +1,21 @@
+from itertools import chain
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from ml_app.models.schemas_tarifa import (
     PrediccionPuntualRequest, PrediccionPuntualResponse,
-    FacturaMensualRequest, FacturaMensualResponse
+    FacturaMensualRequest, FacturaMensualResponse,
+    PrediccionLoteRequest, PrediccionLoteResponse,
+    PronosticoStreamRequest, ProyeccionFacturasRequest, ProyeccionFacturasResponse,
+    ComparacionTarifasRequest, ComparacionTarifasResponse
+)
+from ml_app.dashboard.predictor_tarifa import (
+    obtener_modelo_consumo, predecir_consumo_interno, predecir_puntos_lote,
+    pronosticar_por_bloques
 )
-from ml_app.dashboard.predictor_tarifa import predecir_consumo_interno
-import pandas as pd
-import numpy as np
+from ml_app.dashboard.cache_facturas import cache_facturas
+from ml_app.dashboard.proyeccion import proyectar_facturas
+from ml_app.dashboard.simulador_tarifas import simular_tarifas, esquemas_desde_dicts
 
 # Router principal
 tarifas = APIRouter(prefix="/api", tags=["tarifas"])
@@ -36,6 +46,42 @@ def predecir_consumo_endpoint(request: PrediccionPuntualRequest):
         raise HTTPException(status_code=500, detail=f"Error en predicción: {str(e)}")
 
 
+@tarifas.post("/predict/batch", response_model=PrediccionLoteResponse)
+def predecir_lote_endpoint(request: PrediccionLoteRequest):
+    """
+    Predice consumo y costo para muchos momentos en una sola petición
+    
+    - **timestamps**: Lista de fechas y horas (ISO 8601)
+    - **temperaturas**: Temperatura en °C para cada timestamp
+    - **es_periodo_clases / es_feriado / es_examen**: Valor único o uno por timestamp
+    
+    Todos los puntos se evalúan con una sola llamada al modelo.
+    """
+    try:
+        r = predecir_puntos_lote(
+            timestamps_str=request.timestamps,
+            temperaturas=request.temperaturas,
+            es_periodo_clases=request.es_periodo_clases,
+            es_feriado=request.es_feriado,
+            es_examen=request.es_examen
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Datos inválidos: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en predicción por lotes: {str(e)}")
+
+    return {
+        'total': len(r['timestamps']),
+        'timestamps': r['timestamps'],
+        'dia_semana': r['dia_semana'].tolist(),
+        'consumo_kwh': r['consumo_kwh'].tolist(),
+        'precio_aud_kwh': r['precio_aud_kwh'].tolist(),
+        'costo_aud_15min': r['costo_aud_15min'].tolist(),
+        'costo_aud_hora': r['costo_aud_hora'].tolist(),
+        'es_horario_peak': r['es_horario_peak'].tolist()
+    }
+
+
 @tarifas.post("/predict/monthly", response_model=FacturaMensualResponse)
 def calcular_factura_endpoint(request: FacturaMensualRequest):
     """
@@ -45,63 +91,153 @@ def calcular_factura_endpoint(request: FacturaMensualRequest):
     - **temperatura_promedio**: Temperatura promedio del mes en °C
     - **es_periodo_clases**: Período académico (opcional)
     
-    ⚠️ Este endpoint puede tardar ~30-60 segundos
+    Todos los intervalos de 15 min del mes se predicen en un solo lote. El
+    resultado se guarda en cache por (mes, temperatura redondeada, período).
     """
     try:
-        # Crear todos los intervalos del mes
-        start = f'{request.mes_año}-01 00:00:00'
-        end = pd.Timestamp(start) + pd.DateOffset(months=1) - pd.Timedelta(minutes=15)
-        timestamps = pd.date_range(start=start, end=end, freq='15min')
-        
-        consumo_total = 0
-        costo_total = 0
-        costo_peak = 0
-        costo_offpeak = 0
-        intervalos_peak = 0
-        intervalos_offpeak = 0
-        
-        # Procesar todos los intervalos
-        for ts in timestamps:
-            # Variar temperatura según hora del día
-            temp = request.temperatura_promedio + 4 * np.sin(2 * np.pi * (ts.hour - 6) / 24)
-            
-            # Ajustar por día de semana
-            if ts.dayofweek >= 5:
-                es_clases = False
-            else:
-                es_clases = request.es_periodo_clases
-            
-            # Predicción
-            r = predecir_consumo_interno(
-                timestamp_str=str(ts),
-                temperatura=temp,
-                es_periodo_clases=es_clases
-            )
-            
-            consumo_total += r['consumo_kwh']
-            costo_total += r['costo_aud_15min']
-            
-            if r['es_horario_peak']:
-                costo_peak += r['costo_aud_15min']
-                intervalos_peak += 1
-            else:
-                costo_offpeak += r['costo_aud_15min']
-                intervalos_offpeak += 1
-        
-        num_dias = timestamps[-1].day
-        
-        return {
-            'mes': request.mes_año,
-            'consumo_total_kwh': round(consumo_total, 2),
-            'factura_total_aud': round(costo_total, 2),
-            'costo_peak_aud': round(costo_peak, 2),
-            'costo_offpeak_aud': round(costo_offpeak, 2),
-            'porcentaje_peak': round(costo_peak / costo_total * 100, 1),
-            'costo_promedio_diario': round(costo_total / num_dias, 2),
-            'consumo_promedio_diario': round(consumo_total / num_dias, 2),
-            'intervalos_peak': intervalos_peak,
-            'intervalos_offpeak': intervalos_offpeak
-        }
+        return cache_facturas.obtener(
+            mes_año=request.mes_año,
+            temperatura_promedio=request.temperatura_promedio,
+            es_periodo_clases=request.es_periodo_clases
+        )
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en cálculo de factura: {str(e)}")
+
+
+@tarifas.post("/predict/projection", response_model=ProyeccionFacturasResponse)
+def proyectar_facturas_endpoint(request: ProyeccionFacturasRequest):
+    """
+    Proyecta la factura de varios meses (hasta 24) en una sola petición
+
+    - **mes_inicio**: Primer mes en formato YYYY-MM
+    - **temperaturas_mensuales**: Temperatura promedio de cada mes en °C
+    - **es_periodo_clases**: Valor único o uno por mes
+
+    Devuelve la factura de cada mes (igual a /predict/monthly con la misma
+    temperatura) y los totales por banda tarifaria. El calendario del rango
+    se reutiliza entre peticiones y el modelo evalúa todo el rango por trozos.
+    """
+    try:
+        return proyectar_facturas(
+            mes_inicio=request.mes_inicio,
+            temperaturas_mensuales=request.temperaturas_mensuales,
+            es_periodo_clases=request.es_periodo_clases
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Datos inválidos: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en proyección: {str(e)}")
+
+
+@tarifas.post("/tariffs/compare", response_model=ComparacionTarifasResponse)
+def comparar_tarifas_endpoint(request: ComparacionTarifasRequest):
+    """
+    Compara varios esquemas de tarifa sobre el mismo consumo predicho
+
+    - **mes_inicio / temperaturas_mensuales / es_periodo_clases**: Período a
+      predecir, igual que /predict/projection
+    - **feriados**: Fechas que el modelo predice como feriado y que se
+      tarifican con las bandas de feriado (la tarifa vigente no las distingue)
+    - **esquemas**: Bandas (precio, días, horas, meses) y precio base de cada esquema
+    - **incluir_actual**: Agrega la tarifa vigente y la diferencia contra ella
+
+    El modelo se evalúa una sola vez; cada esquema extra es una fila más en
+    un producto matriz por vector.
+    """
+    try:
+        esquemas = esquemas_desde_dicts([e.model_dump() for e in request.esquemas])
+        return simular_tarifas(
+            mes_inicio=request.mes_inicio,
+            temperaturas_mensuales=request.temperaturas_mensuales,
+            esquemas=esquemas,
+            es_periodo_clases=request.es_periodo_clases,
+            feriados=request.feriados,
+            incluir_actual=request.incluir_actual
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Datos inválidos: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en comparación de tarifas: {str(e)}")
+
+
+@tarifas.get("/predict/monthly/cache")
+def estadisticas_cache_facturas():
+    """Aciertos, fallos, peticiones agrupadas y tamaño del cache de facturas"""
+    return cache_facturas.estadisticas()
+
+
+def _stream_ndjson(bloques):
+    for bloque in bloques:
+        lineas = bloque.to_json(orient='records', lines=True)
+        yield lineas if lineas.endswith('\n') else lineas + '\n'
+
+
+def _stream_arrow(bloques):
+    import io
+    import pyarrow as pa
+
+    buffer = io.BytesIO()
+    writer = None
+    for bloque in bloques:
+        batch = pa.RecordBatch.from_pandas(bloque, preserve_index=False)
+        if writer is None:
+            writer = pa.ipc.new_stream(buffer, batch.schema)
+        writer.write_batch(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if writer is not None:
+        writer.close()
+        yield buffer.getvalue()
+
+
+@tarifas.post("/predict/stream")
+def pronostico_stream_endpoint(request: PronosticoStreamRequest):
+    """
+    Pronóstico intervalo a intervalo para horizontes largos, en streaming
     
+    - **fecha_inicio / fecha_fin**: Rango de días (YYYY-MM-DD, inclusive)
+    - **temperatura_promedio**: Temperatura promedio del período en °C
+    - **es_periodo_clases**: Período académico (opcional)
+    - **formato**: `ndjson` (por defecto) o `arrow` (requiere pyarrow)
+    
+    El rango se evalúa por bloques semanales y cada bloque se envía apenas
+    está listo, así la memoria del servidor no crece con el horizonte.
+    """
+    if request.formato == 'arrow':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(
+                status_code=400,
+                detail="El formato arrow requiere instalar pyarrow"
+            )
+
+    # El generador es perezoso: el modelo se carga y el primer bloque se
+    # evalúa antes de responder, así un error llega como 503/500 y no como
+    # un 200 truncado
+    try:
+        obtener_modelo_consumo()
+        bloques = pronosticar_por_bloques(
+            fecha_inicio=request.fecha_inicio,
+            fecha_fin=request.fecha_fin,
+            temperatura_promedio=request.temperatura_promedio,
+            es_periodo_clases=request.es_periodo_clases
+        )
+        primero = next(bloques, None)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=f"Modelo de consumo no disponible: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Datos inválidos: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error en cálculo de factura: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error en pronóstico: {str(e)}")
+    if primero is not None:
+        bloques = chain([primero], bloques)
+
+    if request.formato == 'arrow':
+        return StreamingResponse(
+            _stream_arrow(bloques), media_type="application/vnd.apache.arrow.stream"
+        )
+
+    return StreamingResponse(_stream_ndjson(bloques), media_type="application/x-ndjson")
@@ -0,0 +1,17 @@
+"""
+Las pruebas usan los artefactos sintéticos de los benchmarks, así que no
+necesitan los .pkl reales. El registro de modelos lee ML_MODELOS_DIR al
+importarse, por eso el directorio se prepara antes de importar ml_app.
+"""
+import os
+import tempfile
+
+from benchmarks.sinteticos import generar_artefactos
+
+
+def pytest_configure(config):
+    directorio = tempfile.mkdtemp(prefix="pruebas_modelos_")
+    generar_artefactos(directorio)
+    os.environ["ML_MODELOS_DIR"] = directorio
+    os.environ["ML_MODELOS_VERIFICAR_SEG"] = "0"
+    os.environ["ML_CALENTAR"] = "0"
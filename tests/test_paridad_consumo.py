@@ -0,0 +1,154 @@
+"""
+Paridad de la predicción de consumo con la implementación original, que
+armaba un DataFrame por intervalo (lags buscados en el histórico en cada
+llamada) y sumaba la factura intervalo a intervalo.
+"""
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_app.dashboard.registro_modelos import MODEL_DIR
+from ml_app.dashboard.predictor_tarifa import (
+    ARCHIVO_PAQUETE, calcular_factura_mensual, predecir_consumo_interno,
+    verificar_paridad_booster
+)
+
+
+@pytest.fixture(scope="module")
+def paquete():
+    return joblib.load(MODEL_DIR / ARCHIVO_PAQUETE)
+
+
+def fila_original(paquete, timestamp, temperatura, es_periodo_clases=True,
+                  es_feriado=False, es_examen=False) -> dict:
+    """Features de un intervalo tal como las calculaba la versión original"""
+    df_historico = paquete['df_historico_ultimos_30_dias']
+    hora = timestamp.hour
+    dia_semana = timestamp.dayofweek
+
+    consumo_historico = df_historico['consumo_neto_kwh']
+    mask_similar = (df_historico.index.hour == hora) & (df_historico.index.dayofweek == dia_semana)
+    if mask_similar.sum() > 0:
+        consumo_similar = consumo_historico[mask_similar].mean()
+    else:
+        consumo_similar = consumo_historico.mean()
+    std_1d = consumo_historico.rolling(96).std().mean()
+    es_hora_pico = 1 if (dia_semana < 5 and 7 <= hora < 22) else 0
+
+    return {
+        'hour': hora,
+        'dayofweek': dia_semana,
+        'month': timestamp.month,
+        'is_weekend': 1 if dia_semana >= 5 else 0,
+        'hour_sin': np.sin(2 * np.pi * hora / 24),
+        'hour_cos': np.cos(2 * np.pi * hora / 24),
+        'dayofweek_sin': np.sin(2 * np.pi * dia_semana / 7),
+        'dayofweek_cos': np.cos(2 * np.pi * dia_semana / 7),
+        'is_holiday': 1 if es_feriado else 0,
+        'is_semester': 1 if es_periodo_clases else 0,
+        'is_exam': 1 if es_examen else 0,
+        'air_temperature': temperatura,
+        'temp_squared': temperatura ** 2,
+        'lag_1d': consumo_similar,
+        'lag_2d': consumo_similar * 0.98,
+        'lag_1w': consumo_similar * 1.02,
+        'rolling_mean_24h': consumo_similar,
+        'rolling_max_24h': consumo_similar * 1.2,
+        'std_1d': std_1d,
+        'std_2h': std_1d * 0.5,
+        'max_1d': consumo_similar * 1.2,
+        'min_1d': consumo_similar * 0.7,
+        'range_1d': consumo_similar * 1.2 - consumo_similar * 0.7,
+        'diff_1': 0,
+        'diff_4': 0,
+        'is_peak_hour': es_hora_pico,
+        'temp_x_peak': temperatura * es_hora_pico,
+        'workday_semester': 1 if (dia_semana < 5 and es_periodo_clases) else 0,
+    }
+
+
+def predecir_original(paquete, filas: list) -> np.ndarray:
+    datos = pd.DataFrame(filas)[paquete['features']]
+    return np.asarray(paquete['modelo'].predict(datos), dtype=np.float64)
+
+
+def factura_original(paquete, mes_año: str, temperatura_promedio: float,
+                     es_periodo_clases: bool) -> dict:
+    """El bucle intervalo a intervalo del endpoint /predict/monthly original"""
+    tarifa = paquete['tarifas']['funcion_tarifa']
+    start = f'{mes_año}-01 00:00:00'
+    end = pd.Timestamp(start) + pd.DateOffset(months=1) - pd.Timedelta(minutes=15)
+    timestamps = pd.date_range(start=start, end=end, freq='15min')
+
+    filas = []
+    for ts in timestamps:
+        temp = temperatura_promedio + 4 * np.sin(2 * np.pi * (ts.hour - 6) / 24)
+        es_clases = False if ts.dayofweek >= 5 else es_periodo_clases
+        filas.append(fila_original(paquete, ts, temp, es_clases))
+    consumos = predecir_original(paquete, filas)
+
+    consumo_total = costo_total = costo_peak = costo_offpeak = 0
+    intervalos_peak = intervalos_offpeak = 0
+    for ts, consumo in zip(timestamps, consumos):
+        precio = tarifa(ts)
+        costo = round(consumo * precio, 4)
+        consumo_total += round(consumo, 2)
+        costo_total += costo
+        if precio == 0.35:
+            costo_peak += costo
+            intervalos_peak += 1
+        else:
+            costo_offpeak += costo
+            intervalos_offpeak += 1
+
+    num_dias = timestamps[-1].day
+    return {
+        'mes': mes_año,
+        'consumo_total_kwh': round(consumo_total, 2),
+        'factura_total_aud': round(costo_total, 2),
+        'costo_peak_aud': round(costo_peak, 2),
+        'costo_offpeak_aud': round(costo_offpeak, 2),
+        'porcentaje_peak': round(costo_peak / costo_total * 100, 1),
+        'costo_promedio_diario': round(costo_total / num_dias, 2),
+        'consumo_promedio_diario': round(consumo_total / num_dias, 2),
+        'intervalos_peak': intervalos_peak,
+        'intervalos_offpeak': intervalos_offpeak,
+    }
+
+
+@pytest.mark.parametrize("timestamp,temperatura,clases,feriado,examen", [
+    ("2026-03-04T14:30:00", 24.5, True, False, False),
+    ("2026-03-07T03:15:00", -8.0, True, False, False),
+    ("2026-07-13T21:45:00", 49.0, False, True, True),
+    ("2026-12-25T07:00:00", 18.0, True, True, False),
+])
+def test_prediccion_puntual_igual_a_la_original(paquete, timestamp, temperatura,
+                                                clases, feriado, examen):
+    ts = pd.Timestamp(timestamp)
+    consumo = predecir_original(
+        paquete, [fila_original(paquete, ts, temperatura, clases, feriado, examen)]
+    )[0]
+    precio = paquete['tarifas']['funcion_tarifa'](ts)
+
+    r = predecir_consumo_interno(timestamp, temperatura, clases, feriado, examen)
+
+    assert r['consumo_kwh'] == round(consumo, 2)
+    assert r['precio_aud_kwh'] == precio
+    assert r['costo_aud_15min'] == round(consumo * precio, 4)
+    assert r['costo_aud_hora'] == round(consumo * precio * 4, 2)
+    assert r['es_horario_peak'] == (precio == 0.35)
+
+
+@pytest.mark.parametrize("mes_año,temperatura,clases", [
+    ("2026-02", 22.0, True),
+    ("2026-04", 15.5, False),
+    ("2024-02", 30.0, True),
+])
+def test_factura_mensual_igual_a_la_original(paquete, mes_año, temperatura, clases):
+    assert calcular_factura_mensual(mes_año, temperatura, clases) == \
+        factura_original(paquete, mes_año, temperatura, clases)
+
+
+def test_booster_nativo_igual_a_modelo_predict():
+    assert verificar_paridad_booster() <= 1e-9
@@ -0,0 +1,56 @@
+"""
+Cache de referencias con DB_MODO=async: varias peticiones concurrentes que
+encuentran el cache vencido no deben bloquear el event loop.
+"""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from app.dashboard.cache_referencias import cache_referencias
+from benchmarks.carga_db import app_async, crear_base
+
+TIMEOUT_SEG = 30
+
+
+async def _peticiones_concurrentes(app, rutas) -> list:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                 base_url="http://prueba") as cliente:
+        try:
+            return await asyncio.gather(*(cliente.get(ruta) for ruta in rutas))
+        finally:
+            await app.state.cerrar()
+
+
+def _ejecutar_con_timeout(corrutina):
+    # Un deadlock bloquea el hilo del loop, así que asyncio.wait_for no
+    # alcanzaría a cancelar: se corre en otro hilo y se espera con timeout
+    resultado = {}
+
+    def correr():
+        resultado["valor"] = asyncio.run(corrutina)
+
+    hilo = threading.Thread(target=correr, daemon=True)
+    hilo.start()
+    hilo.join(TIMEOUT_SEG)
+    assert not hilo.is_alive(), "las peticiones concurrentes no terminaron (deadlock)"
+    return resultado["valor"]
+
+
+def test_reconstruccion_concurrente_no_bloquea(tmp_path):
+    ruta = str(tmp_path / "referencias.db")
+    crear_base(ruta, num_ips=0)
+    rutas = ["/api/ciudades/", "/api/departamentos/", "/api/departamentos/1/ciudades"] * 4
+    app = app_async(ruta, latencia=0.02, conexiones=len(rutas))
+
+    cache_referencias.invalidar()
+    antes = cache_referencias.reconstrucciones
+    respuestas = _ejecutar_con_timeout(_peticiones_concurrentes(app, rutas))
+
+    assert [r.status_code for r in respuestas] == [200] * len(rutas)
+    assert respuestas[0].json() == [{"id": 1, "nombre": "Medellín", "id_departamento": 1}]
+    # El asyncio.Lock deja que sólo la primera petición reconstruya
+    assert cache_referencias.reconstrucciones == antes + 1